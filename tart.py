@@ -1,8 +1,16 @@
 from datetime import datetime, timedelta
-from os import system, name, rename, remove, listdir, path, mkdir, getcwd, environ
+from os import system, name, rename, replace, remove, listdir, path, mkdir, getcwd, environ, fsync
 from shutil import get_terminal_size
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+from collections import OrderedDict, ChainMap, namedtuple
+from types import MappingProxyType
+from contextlib import closing
 import threading
 import subprocess
+import hashlib
+import marshal
+import sqlite3
 import time
 import json
 import sys
@@ -10,6 +18,8 @@ import re
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     from rich.text import Text
     from rich.table import Table
     from rich.panel import Panel
@@ -18,21 +28,67 @@ except ModuleNotFoundError:
     with open('requirements.txt') as requirements:
         subprocess.check_call([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'])
         import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
         from rich.table import Table
         from rich.console import Console
 
-
 VERSION = 'asparagus'
 
 DEBUG = False
 
+FLUSH_INTERVAL = 300
+JOURNAL_LIMIT = 200
+
+# Storage backend for the tracker, one of STORAGE
+STORAGE_BACKEND = environ.get('TART_STORAGE', 'json')
+
+# Each entity is read back whole from entities. The tables after it hold the fields inv need, requires and ls tasks select on, kept in step with every saved change
+SQLITE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entities (section TEXT NOT NULL, guid TEXT NOT NULL, progress TEXT NOT NULL, data TEXT NOT NULL, PRIMARY KEY (section, guid));
+CREATE TABLE IF NOT EXISTS items (guid TEXT PRIMARY KEY, ordinal INTEGER NOT NULL, need_fir INTEGER NOT NULL, need_nir INTEGER NOT NULL, have_fir INTEGER NOT NULL, have_nir INTEGER NOT NULL, consumed_fir INTEGER NOT NULL, consumed_nir INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS tasks (guid TEXT PRIMARY KEY, ordinal INTEGER NOT NULL, status TEXT NOT NULL, tracked INTEGER NOT NULL, min_level INTEGER NOT NULL, trader TEXT NOT NULL, kappa INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS task_maps (task TEXT NOT NULL REFERENCES tasks (guid), map TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS task_requirements (task TEXT NOT NULL REFERENCES tasks (guid), prerequisite TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS barters (guid TEXT PRIMARY KEY, ordinal INTEGER NOT NULL, status TEXT NOT NULL, tracked INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS crafts (guid TEXT PRIMARY KEY, ordinal INTEGER NOT NULL, status TEXT NOT NULL, tracked INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS requirements (section TEXT NOT NULL, guid TEXT NOT NULL, ordinal INTEGER NOT NULL, item TEXT NOT NULL REFERENCES items (guid), count INTEGER NOT NULL, fir INTEGER NOT NULL, role TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS items_need_fir ON items (need_fir - have_fir);
+CREATE INDEX IF NOT EXISTS items_need_nir ON items (need_nir - have_nir);
+CREATE INDEX IF NOT EXISTS tasks_open ON tasks (status, tracked, min_level);
+CREATE INDEX IF NOT EXISTS task_maps_map ON task_maps (map, task);
+CREATE INDEX IF NOT EXISTS task_requirements_task ON task_requirements (task);
+CREATE INDEX IF NOT EXISTS barters_tracked ON barters (tracked);
+CREATE INDEX IF NOT EXISTS crafts_tracked ON crafts (tracked);
+CREATE INDEX IF NOT EXISTS requirements_item ON requirements (item, section, role);
+'''
+
+# Stored as user_version. Files with an older one have their query tables filled from the entities when opened
+SQLITE_VERSION = 1
+SQLITE_TABLES = ['items', 'tasks', 'task_maps', 'task_requirements', 'barters', 'crafts', 'requirements']
+SQLITE_COUNTERS = ['need_fir', 'need_nir', 'have_fir', 'have_nir', 'consumed_fir', 'consumed_nir']
+
+# Tasks not complete, tracked, within the player's level and with every prerequisite complete, as available_tasks has them
+SQLITE_AVAILABLE_TASKS = '''
+SELECT guid FROM tasks WHERE status = 'incomplete' AND tracked = 1 AND min_level <= ? AND NOT EXISTS (
+    SELECT 1 FROM task_requirements LEFT JOIN tasks AS prerequisite ON prerequisite.guid = task_requirements.prerequisite
+    WHERE task_requirements.task = tasks.guid AND prerequisite.status IS NOT 'complete'
+)'''
+
+CHECKSUM_HEADER = '{"checksum": "'
+
+# Binary snapshot written next to the tracker for fast loading. Bump SNAPSHOT_SCHEMA whenever its layout changes
+SNAPSHOT_MAGIC = b'TART'
+SNAPSHOT_SCHEMA = 2
+
 INV = 0
 HAVE = 1
 NEED = 2
 
 USAGE = '''
-tart.py {debug}\n
-A lightweight python CLI for tracking tasks, hideout stations, barters, and items inventory for Escape From Tarkov. Use the "import" command if this is your first time! Using "debug" as a positional argument enters debug mode.\n
+tart.py {debug|benchmark}\n
+A lightweight python CLI for tracking tasks, hideout stations, barters, and items inventory for Escape From Tarkov. Use the "import" command if this is your first time! Using "debug" as a positional argument enters debug mode. Using "benchmark" compares loading the database from JSON and from its snapshot.\n
 usage:\n
 > command [required args] {optional args}\n
 commands
@@ -163,6 +219,7 @@ IMPORT_HELP = '''
 > import {type}\n
 Pulls latest Escape From Tarkov game data from api.tarkov.dev and overwrites all application files (WARNING: This will reset all progress!)\n
 prices : Manually imports only item price data (Does not reset any progress)
+batch : Same as a full import, but requests all game data from the server in a single query (WARNING: This will reset all progress!)
 delta : Performs a delta import, attempting to save all current data, including task, hideout, barter, and craft progress while importing updated game data (WARNING: This may corrupt some data!)
 '''
 BACKUP_HELP = '''
@@ -184,6 +241,425 @@ HIDEOUT_TABLE = ['Station Name', 'Station Status', 'Tracked', 'Station GUID']
 BARTER_TABLE = ['Barter GUID', 'Trader', 'Loyalty Level', 'Barter Status', 'Tracked', 'Restarts']
 CRAFTS_TABLE = ['Craft GUID', 'Station', 'Craft Status', 'Tracked', 'Restarts']
 UNTRACKED_TABLE = ['Entity Name', 'Type', 'Tracked', 'Kappa Required']
+PROGRESS_FIELDS = {
+    'tasks': ['status', 'tracked'],
+    'hideout': ['status', 'tracked'],
+    'barters': ['status', 'tracked', 'restarts'],
+    'crafts': ['status', 'tracked', 'restarts'],
+    'items': ['need_fir', 'need_nir', 'need_sources', 'have_fir', 'have_nir', 'consumed_fir', 'consumed_nir']
+}
+
+# Top-level player state, stored with the progress overlay rather than the catalogue
+PROGRESS_KEYS = ['notes', 'player_level']
+
+# The progress overlay is kept in one file per section and key, named in the tracker's manifest
+SHARDS = list(PROGRESS_FIELDS.keys()) + PROGRESS_KEYS
+
+# Sections whose tracked entities add to the need of items, kept apart in each item's need_sources
+NEED_SOURCES = ['tasks', 'hideout', 'barters', 'crafts']
+
+API_URL = environ.get('TART_API_URL', 'https://api.tarkov.dev/graphql')
+
+# Seconds to wait for a connection and for a response. Failed requests are retried with exponential backoff
+HTTP_TIMEOUT = (10, 120)
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+
+# Root fields requested from the API, in the order imported data is merged
+QUERIES = {
+    'maps': """
+        maps {
+            id
+            normalizedName
+        }
+    """,
+    'traders': """
+        traders {
+            id
+            normalizedName
+        }
+    """,
+    'items': """
+        items {
+            id
+            normalizedName
+            shortName
+            sellFor {
+                vendor {
+                    normalizedName
+                    ... on FleaMarket {
+                        minPlayerLevel
+                    }
+                }
+                price
+                currency
+            }
+            buyFor {
+                vendor {
+                    normalizedName
+                    ... on TraderOffer {
+                        minTraderLevel
+                        taskUnlock {
+                            normalizedName
+                        }
+                    }
+                }
+                price
+                currency
+            }
+            avg24hPrice
+            fleaMarketFee
+        }
+    """,
+    'tasks': """
+        tasks {
+            id
+            name
+            normalizedName
+            trader {
+                id
+            }
+            map {
+                id
+            }
+            minPlayerLevel
+            taskRequirements {
+                task {
+                    id
+                }
+            }
+            traderRequirements {
+                id
+                requirementType
+                trader {
+                    id
+                }
+            }
+            objectives {
+                id
+                type
+                description
+                optional
+                maps {
+                    id
+                }
+                ... on TaskObjectiveExtract {
+                    maps {
+                        id
+                    }
+                    exitStatus
+                    exitName
+                    zoneNames
+                }
+                ... on TaskObjectiveItem {
+                    id
+                    count
+                    foundInRaid
+                    item {
+                        id
+                    }
+                }
+                ... on TaskObjectivePlayerLevel {
+                    playerLevel
+                }
+                ... on TaskObjectiveQuestItem {
+                    questItem {
+                        id
+                    }
+                    count
+                }
+                ... on TaskObjectiveShoot {
+                    targetNames
+                    count
+                    shotType
+                    zoneNames
+                    bodyParts
+                    usingWeapon {
+                        id
+                    }
+                    usingWeaponMods {
+                        id
+                    }
+                    wearing {
+                        id
+                    }
+                    notWearing {
+                        id
+                    }
+                    distance {
+                        value
+                    }
+                    playerHealthEffect {
+                        bodyParts
+                        effects
+                        time {
+                            value
+                        }
+                    }
+                    enemyHealthEffect {
+                        bodyParts
+                        effects
+                        time {
+                            value
+                        }
+                    }
+                    timeFromHour
+                    timeUntilHour
+                }
+                ... on TaskObjectiveSkill {
+                    skillLevel {
+                        name
+                        level
+                    }
+                }
+                ... on TaskObjectiveTaskStatus {
+                    task {
+                        id
+                    }
+                    status
+                }
+                ... on TaskObjectiveTraderLevel {
+                    trader {
+                        id
+                    }
+                    level
+                }
+                ... on TaskObjectiveTraderStanding {
+                    trader {
+                        id
+                    }
+                    value
+                }
+                ... on TaskObjectiveUseItem {
+                    useAny {
+                        id
+                    }
+                    count
+                    zoneNames
+                }
+            }
+            neededKeys {
+                keys {
+                    id
+                }
+            }
+            kappaRequired
+            lightkeeperRequired
+        }
+    """,
+    'hideout': """
+        hideoutStations {
+            id
+            normalizedName
+            levels {
+                id
+                level
+                itemRequirements {
+                    id
+                    count
+                    attributes {
+                        type
+                        value
+                    }
+                    item {
+                        id
+                    }
+                }
+                stationLevelRequirements {
+                    station {
+                        id
+                    }
+                    level
+                }
+            }
+        }
+    """,
+    'barters': """
+        barters {
+            id
+            trader {
+            id
+            }
+            level
+            taskUnlock {
+            id
+            }
+            requiredItems {
+            item {
+                id
+            }
+            count
+            }
+            rewardItems {
+            item {
+                id
+            }
+            count
+            }
+        }
+    """,
+    'crafts': """
+        crafts {
+            id
+            duration
+            station {
+            id
+            }
+            level
+            taskUnlock {
+            id
+            }
+            requiredItems {
+            item {
+                id
+            }
+            count
+            }
+            rewardItems {
+            item {
+                id
+            }
+            count
+            }
+        }
+    """
+}
+
+# Price refreshes only ask for what process_item needs to reprice an item already in the database
+PRICES_QUERY = """
+    items {
+        id
+        sellFor {
+            vendor {
+                normalizedName
+                ... on FleaMarket {
+                    minPlayerLevel
+                }
+            }
+            price
+            currency
+        }
+        buyFor {
+            vendor {
+                normalizedName
+                ... on TraderOffer {
+                    minTraderLevel
+                    taskUnlock {
+                        normalizedName
+                    }
+                }
+            }
+            price
+            currency
+        }
+        avg24hPrice
+    }
+"""
+
+PRICE_FIELDS = ['flea_price', 'flea_currency', 'best_trader_sell', 'best_trader_sell_price', 'best_trader_sell_currency', 'best_trader_sell_roubles', 'best_trader_buy', 'best_trader_buy_price', 'best_trader_buy_currency', 'best_trader_buy_roubles', 'best_trader_level', 'best_trader_task_req', 'flea_level']
+
+# Response headers remembered from the last price refresh and the request headers that send them back
+VALIDATORS = {
+    'ETag': 'If-None-Match',
+    'Last-Modified': 'If-Modified-Since'
+}
+
+# One keep-alive connection pool shared by every request to the API. The session's default Accept-Encoding already asks for gzip and deflate, plus br/zstd when urllib3 can decode them
+# It holds a connection for each query and one for the item stream, the most fetch_data runs at once
+HTTP = requests.Session()
+HTTP_ADAPTER = HTTPAdapter(pool_maxsize = len(QUERIES) + 1, max_retries = Retry(total = HTTP_RETRIES, backoff_factor = HTTP_BACKOFF, status_forcelist = [429, 500, 502, 503, 504], allowed_methods = None))
+HTTP.mount('https://', HTTP_ADAPTER)
+HTTP.mount('http://', HTTP_ADAPTER)
+
+# Seconds taken by the most recent fetch of each query
+FETCH_TIMES = {}
+
+# Characters normalize drops, hyphens become spaces
+NORMALIZE_TABLE = str.maketrans({'-': ' ', '.': None, '(': None, ')': None, '+': None, '=': None, '\'': None, '"': None, ',': None, '\\': None, '/': None, '?': None, '#': None, '$': None, '&': None, '!': None, '@': None, '[': None, ']': None, '{': None, '}': None, '_': None})
+SPACES = re.compile(' +')
+
+# Name fields matched by string_compare for each searchable section. Barters and crafts have no names and are only found by GUID
+INDEXED_FIELDS = {
+    'tasks': ['normalizedName', 'name'],
+    'hideout': ['normalizedName'],
+    'barters': [],
+    'crafts': [],
+    'items': ['normalizedName', 'shortName'],
+    'maps': ['normalizedName'],
+    'traders': ['normalizedName']
+}
+
+# GUIDs are hexadecimal, hideout levels add a dash and the level. Shorter prefixes are too likely to be part of a name
+GUID_PREFIX = re.compile('[0-9a-f-]+')
+GUID_PREFIX_LENGTH = 4
+
+# Trigram similarity below which names are not offered, how far ahead the best match must be to be picked without asking, and how many to offer
+FUZZY_THRESHOLD = 0.3
+FUZZY_DOMINANCE = 1.5
+FUZZY_LIMIT = 9
+
+# Lookup indexes over INDEXED_FIELDS and the consumers of every item, for one database at a time. Each section is
+# indexed from its own entities the first time it is looked up, so a partially loaded database only indexes what it has
+INDEX = {
+    'database': None,
+    'sections': {},
+    'consumers': None
+}
+
+# Per-section counters bumped by every saved change, search results are cached against them
+GENERATIONS = {section: 0 for section in INDEXED_FIELDS.keys()}
+
+# Most recent search results as GUIDs, least recently used first, for one database at a time and the sections it had loaded
+SEARCH_CACHE = {
+    'database': None,
+    'sections': frozenset(),
+    'results': OrderedDict()
+}
+SEARCH_CACHE_SIZE = 256
+
+# Each part of a search, the section its results come from and the sections whose changes can alter them
+SEARCH_PARTS = {
+    'tasks': ('tasks', ['tasks']),
+    'hideout': ('hideout', ['hideout']),
+    'barters': ('barters', ['barters']),
+    'crafts': ('crafts', ['crafts']),
+    'items': ('items', ['items']),
+    'maps': ('maps', ['maps']),
+    'traders': ('traders', ['traders']),
+    'tasks_by_item': ('tasks', ['items', 'tasks']),
+    'hideout_by_item': ('hideout', ['items', 'hideout']),
+    'barters_by_item': ('barters', ['items', 'barters']),
+    'crafts_by_item': ('crafts', ['items', 'crafts'])
+}
+
+# Static structure of tasks, stations, barters and crafts is held as tuples in memory, and written out in the shape the API returned it
+Requirement = namedtuple('Requirement', ['item', 'count', 'fir'])
+StationRequirement = namedtuple('StationRequirement', ['id', 'item', 'count', 'fir', 'attributes'])
+COMPACT_FIELDS = {
+    'tasks': ['taskRequirements', 'neededKeys'],
+    'hideout': ['itemRequirements', 'stationLevelRequirements'],
+    'barters': ['requiredItems', 'rewardItems'],
+    'crafts': ['requiredItems', 'rewardItems']
+}
+
+# Task prerequisites both ways, with the count of unmet ones and the tasks available to work on, for one database at a time. Kept current by save_database
+TASK_GRAPH = {
+    'database': None,
+    'dependents': {},
+    'unmet': {},
+    'complete': set(),
+    'levels': [],
+    'level': None,
+    'ordinals': {},
+    'available': set()
+}
+
+# Item prices older than this many hours are refreshed in the background. Seconds between checks, and before retrying a failed refresh
+PRICE_REFRESH_HOURS = float(environ.get('TART_PRICE_REFRESH_HOURS', 24))
+PRICE_CHECK_INTERVAL = 60
+PRICE_RETRY_INTERVAL = 900
+
+ITEMS_MARKER = re.compile(r'"items"\s*:\s*\[')
 
 
 ###################################################
@@ -194,7 +670,7 @@ UNTRACKED_TABLE = ['Entity Name', 'Type', 'Tracked', 'Kappa Required']
 
 
 # Command parsing
-def parser(tracker_file, directory, command):
+def parser(session, command):
     command = command.lower().split(' ')
     print_debug(f'Received command >> {command} <<')
 
@@ -202,25 +678,25 @@ def parser(tracker_file, directory, command):
     if (command[0] == 'inv'):
         if (len(command) == 1):
             print_debug(f'Executing >> {command[0]} <<')
-            inventory(tracker_file, directory)
+            inventory(session)
         elif (command[1] == 'tasks'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_tasks(tracker_file, directory)
+            inventory_tasks(session)
         elif (command[1] == 'stations' or command[1] == 'hideout'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_hideout(tracker_file, directory)
+            inventory_hideout(session)
         elif (command[1] == 'barters'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_barters(tracker_file, directory)
+            inventory_barters(session)
         elif (command[1] == 'crafts'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_crafts(tracker_file, directory)
+            inventory_crafts(session)
         elif (command[1] == 'have'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_have(tracker_file, directory)
+            inventory_have(session)
         elif (command[1] == 'need'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            inventory_need(tracker_file, directory)
+            inventory_need(session)
         elif (command[1] == 'help' or command[1] == 'h'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
             print(INV_HELP)
@@ -235,41 +711,41 @@ def parser(tracker_file, directory, command):
         elif (command[1] == 'tasks'):
             if (len(command) == 3):
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2]} <<')
-                list_tasks(tracker_file, directory, command[2])
+                list_tasks(session, command[2])
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} all <<')
-                list_tasks(tracker_file, directory, 'all')
+                list_tasks(session, 'all')
         elif (command[1] == 'stations' or command[1] == 'hideout'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            list_stations(tracker_file, directory)
+            list_stations(session)
         elif (command[1] == 'barters'):
             if (len(command) == 3):
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2]} <<')
-                list_barters(tracker_file, directory, command[2])
+                list_barters(session, command[2])
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} all <<')
-                list_barters(tracker_file, directory, 'all')
+                list_barters(session, 'all')
         elif (command[1] == 'crafts'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            list_crafts(tracker_file, directory)
+            list_crafts(session)
         elif (command[1] == 'untracked'):
             if (len(command) == 3):
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2]} <<')
                 
                 if (command[2] == 'nokappa'):
-                    list_untracked(tracker_file, directory, True)
+                    list_untracked(session, True)
                 else:
                     print_debug(f'Failed >> {command[0]} {command[1]} <<')
                     print_error('Command not recognized')
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} <<')
-                list_untracked(tracker_file, directory, False)
+                list_untracked(session, False)
         elif (command[1] == 'maps'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            list_maps(tracker_file, directory)
+            list_maps(session)
         elif (command[1] == 'traders'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            list_traders(tracker_file, directory)
+            list_traders(session)
         elif (command[1] == 'help' or command[1] == 'h'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
             print(LS_HELP)
@@ -290,25 +766,25 @@ def parser(tracker_file, directory, command):
                 ignore_barters = False
                 ignore_crafts = True
                 pattern = ' '.join(command[1:-1])
-                required_search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+                required_search(session, pattern, ignore_barters, ignore_crafts)
             elif (command[-1] == 'crafts'):
                 print_debug(f'Executing >> {command[0]} {command[1:-1]} {command[-1]} <<')
                 ignore_barters = True
                 ignore_crafts = False
                 pattern = ' '.join(command[1:-1])
-                required_search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+                required_search(session, pattern, ignore_barters, ignore_crafts)
             elif (command[-1] == 'all'):
                 print_debug(f'Executing >> {command[0]} {command[1:-1]} {command[-1]} <<')
                 ignore_barters = False
                 ignore_crafts = False
                 pattern = ' '.join(command[1:-1])
-                required_search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+                required_search(session, pattern, ignore_barters, ignore_crafts)
             else:
                 print_debug(f'Executing >> {command[0]} {command[1:]} <<')
                 ignore_barters = True
                 ignore_crafts = True
                 pattern = ' '.join(command[1:])
-                required_search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+                required_search(session, pattern, ignore_barters, ignore_crafts)
     # Track
     elif (command[0] == 'track'):
         if (len(command) < 2):
@@ -319,7 +795,7 @@ def parser(tracker_file, directory, command):
             print(TRACK_HELP)
         else:
             print_debug(f'Executing >> {command[0]} {command[1:]} <<')
-            track(tracker_file, directory, ' '.join(command[1:]))
+            track(session, ' '.join(command[1:]))
     elif (command[0] == 'untrack'):
         if (len(command) < 2):
             print_debug(f'Failed >> {command[0]} <<')
@@ -329,7 +805,7 @@ def parser(tracker_file, directory, command):
             print(UNTRACK_HELP)
         else:
             print_debug(f'Executing >> {command[0]} {command[1:]} <<')
-            untrack(tracker_file, directory, ' '.join(command[1:]))
+            untrack(session, ' '.join(command[1:]))
     # Complete
     elif (command[0] == 'complete'):
         if (len(command) < 2):
@@ -356,7 +832,7 @@ def parser(tracker_file, directory, command):
                 recurse = False
                 argument = ' '.join(command[1:])
 
-            complete(tracker_file, directory, argument, force, recurse)
+            complete(session, argument, force, recurse)
     # Restart
     elif (command[0] == 'restart'):
         if (len(command) < 2):
@@ -367,7 +843,7 @@ def parser(tracker_file, directory, command):
             print(RESTART_HELP)
         elif (command[1]):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            restart(tracker_file, directory, command[1])
+            restart(session, command[1])
         else:
             print_debug(f'Failed >> {command[0]} {command[1]} <<')
             print_error('Command not recognized')
@@ -390,12 +866,12 @@ def parser(tracker_file, directory, command):
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2:-1]} {command[-1]} <<')
                 count = int(command[1])
                 argument = ' '.join(command[2:-1])
-                write_item_fir(tracker_file, directory, count, argument = argument)
+                write_item_fir(session, count, argument = argument)
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2:]} <<')
                 count = int(command[1])
                 argument = ' '.join(command[2:])
-                write_item_nir(tracker_file, directory, count, argument = argument)
+                write_item_nir(session, count, argument = argument)
     # Delete
     elif (command[0] == 'del'):
         if (len(command) < 2):
@@ -415,18 +891,18 @@ def parser(tracker_file, directory, command):
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2:-1]} {command[-1]} <<')
                 count = int(command[1])
                 argument = ' '.join(command[2:-1])
-                unwrite_item_fir(tracker_file, directory, count, argument = argument)
+                unwrite_item_fir(session, count, argument = argument)
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} {command[2:]} <<')
                 count = int(command[1])
                 argument = ' '.join(command[2:])
-                unwrite_item_nir(tracker_file, directory, count, argument = argument)
+                unwrite_item_nir(session, count, argument = argument)
     # Level
     elif (command[0] == 'level'):
         if (len(command) > 1):
             if (command[1] == 'up'):
                 print_debug(f'Executing >> {command[0]} {command[1]} <<')
-                level_up(tracker_file, directory)
+                level_up(session)
             elif (command[1] == 'help' or command[1] == 'h'):
                 print_debug(f'Executing >> {command[0]} {command[1]} <<')
                 print(LEVEL_HELP)
@@ -434,7 +910,7 @@ def parser(tracker_file, directory, command):
                 if (len(command) == 3):
                     if (command[2].isdigit() and int(command[2]) > 0):
                         print_debug(f'Executing >> {command[0]} {command[1]} {command[2]} <<')
-                        set_level(tracker_file, directory, int(command[2]))
+                        set_level(session, int(command[2]))
                     else:
                         print_debug(f'Failed >> {command[0]} {command[1]} {command[2]} <<')
                         print_error('Command not recognized')
@@ -446,7 +922,7 @@ def parser(tracker_file, directory, command):
                 print_error('Command not recognized')
         else:
             print_debug(f'Executing >> {command[0]} <<')
-            check_level(tracker_file, directory)
+            check_level(session)
     # Notes
     elif (command[0] == 'note'):
         if (len(command) > 1):
@@ -455,10 +931,10 @@ def parser(tracker_file, directory, command):
                 print(NOTE_HELP)
             else:
                 print_debug(f'Executing >> {command[0]} {command[1]} <<')
-                note(tracker_file, directory, command[1:])
+                note(session, command[1:])
         else:
             print_debug(f'Executing >> {command[0]}<<')
-            note(tracker_file, directory, [command[0]])
+            note(session, [command[0]])
     # Clear
     elif (command[0] == 'clear'):
         if (len(command) == 1):
@@ -477,7 +953,7 @@ def parser(tracker_file, directory, command):
             _confirmation_ = input('> ').lower()
 
             if (_confirmation_ == 'y'):
-                import_data(tracker_file, directory)
+                import_data(session)
             else:
                 print_debug(f'Abort >> {command[0]} << because >> {_confirmation_} <<')
                 print('Aborted')
@@ -486,18 +962,28 @@ def parser(tracker_file, directory, command):
             print(IMPORT_HELP)
         elif (command[1] == 'prices'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
-            database = open_database(tracker_file, directory)
-            database = import_items(database, {
+            database = load_database(session)
+
+            if (database and import_items(database, {
                 'Content-Type': 'application/json'
-            })
-            print('Price data refreshed')
-            write_database(tracker_file, directory, database)
+            })):
+                print('Price data refreshed')
+                save_database(session, database)
+        elif (command[1] == 'batch'):
+            print_warning('Import and overwite all data in a single request? (Y/N)')
+            _confirmation_ = input('> ').lower()
+
+            if (_confirmation_ == 'y'):
+                import_data(session, batch = True)
+            else:
+                print_debug(f'Abort >> {command[0]} << because >> {_confirmation_} <<')
+                print('Aborted')
         elif (command[1] == 'delta'):
             print_warning('Import new data without overwriting? (Y/N)')
             _confirmation_ = input('> ').lower()
 
             if (_confirmation_ == 'y'):
-                delta(tracker_file, directory)
+                delta(session)
             else:
                 print_debug(f'Abort >> {command[0]} << because >> {_confirmation_} <<')
                 print('Aborted')
@@ -508,7 +994,7 @@ def parser(tracker_file, directory, command):
     elif (command[0] == 'backup'):
         if (len(command) == 1):
             print_debug(f'Executing >> {command[0]} <<')
-            backup(tracker_file, directory)
+            backup(session)
         elif (command[1] == 'help' or command[1] == 'h'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
             print(BACKUP_HELP)
@@ -519,7 +1005,7 @@ def parser(tracker_file, directory, command):
     elif (command[0] == 'restore'):
         if (len(command) == 1):
             print_debug(f'Executing >> {command[0]} <<')
-            restore(tracker_file, directory)
+            restore(session)
         elif (command[1] == 'help' or command[1] == 'h'):
             print_debug(f'Executing >> {command[0]} {command[1]} <<')
             print(RESTORE_HELP)
@@ -533,7 +1019,17 @@ def parser(tracker_file, directory, command):
     # Exit
     elif (command[0] == 'stop' or command[0] == 's' or command[0] == 'quit' or command[0] == 'q' or command[0] == 'exit'):
         print_debug(f'Executing >> {command[0]} <<')
-        database = open_database(tracker_file, directory)
+        database = load_database(session, [])
+
+        if (not database):
+            return False
+
+        flush_database(session, force = True)
+        tracker_file = session['tracker_file']
+        directory = session['directory']
+
+        # Autosaves are whole databases in JSON like manual backups, so later catalogue writes and the backend in use cannot change what they restore
+        database = load_database(session)
 
         if (not database):
             return False
@@ -557,221 +1053,1172 @@ def parser(tracker_file, directory, command):
             ignore_barters = False
             ignore_crafts = True
             pattern = ' '.join(command[0:-1])
-            search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+            search(session, pattern, ignore_barters, ignore_crafts)
         elif (command[-1] == 'crafts'):
             print_debug(f'Executing >> {command[0]} {command[1:-1]} {command[-1]} <<')
             ignore_barters = True
             ignore_crafts = False
             pattern = ' '.join(command[0:-1])
-            search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+            search(session, pattern, ignore_barters, ignore_crafts)
         elif (command[-1] == 'all'):
             print_debug(f'Executing >> {command[0]} {command[1:-1]} {command[-1]} <<')
             ignore_barters = False
             ignore_crafts = False
             pattern = ' '.join(command[0:-1])
-            search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+            search(session, pattern, ignore_barters, ignore_crafts)
         else:
             print_debug(f'Executing >> {command[0]} {command[1:]} <<')
             ignore_barters = True
             ignore_crafts = True
             pattern = ' '.join(command[0:])
-            search(tracker_file, directory, pattern, ignore_barters, ignore_crafts)
+            search(session, pattern, ignore_barters, ignore_crafts)
     
     return True
 
 # Database editing
 def open_database(file_path, directory):
+    # A snapshot at least as new as the JSON holds the same data and loads much faster
+    file = open_snapshot(file_path, directory)
+
+    if (not file):
+        file = open_json(file_path, directory)
+
+    if (not file):
+        return False
+
+    if (file['version'] != VERSION):
+        print_warning('Incorrect database version detected. Please update with a delta import')
+        return compact_database(file)
+    
+    return compact_database(file)
+
+def open_json(file_path, directory):
     try:
         with open(f'{directory}\\{file_path}', 'r', encoding = 'utf-8') as open_file:
             print_debug(f'Opened file >> {file_path} <<')
-            file = json.load(open_file)
-
-            if (file['version'] != VERSION):
-                print_warning('Incorrect database version detected. Please update with a delta import')
-                return file
+            contents = open_file.read()
     except FileNotFoundError:
         print_error('Database not found')
         return False
-    
-    return file
 
-def write_database(file_path, directory, data):
-    with open(f'{directory}\\{file_path}', 'w', encoding = 'utf-8') as open_file:
-        open_file.write(json.dumps(data))
-        print_debug(f'Wrote file >> {file_path} <<')
+    # Files written with a checksum header carry the digest of the rest of the document
+    if (contents.startswith(CHECKSUM_HEADER)):
+        checksum = contents[len(CHECKSUM_HEADER):len(CHECKSUM_HEADER) + 64]
+        contents = '{' + contents[len(CHECKSUM_HEADER) + 67:]
+
+        if (hashlib.sha256(contents.encode('utf-8')).hexdigest() != checksum):
+            print_error(f'{file_path} is damaged (checksum mismatch). Please restore from a backup')
+            return False
+
+    try:
+        return json.loads(contents)
+    except json.JSONDecodeError:
+        print_error(f'{file_path} is damaged (incomplete or invalid JSON). Please restore from a backup')
+        return False
+
+def write_database(file_path, directory, data, snapshot = False):
+    data = expand_database(data)
+    write_contents(file_path, directory, json.dumps(data))
+
+    # Written after the JSON so a snapshot is never newer than the JSON it was taken with
+    if (snapshot):
+        write_snapshot(file_path, directory, data)
+
     return
 
-# Find unique functions (return GUID)
-def disambiguate(matches):
-    options = []
-    index = 0
+def write_contents(file_path, directory, contents):
+    checksum = hashlib.sha256(contents.encode('utf-8')).hexdigest()
+    temp_file = f'{directory}\\{file_path}.tmp'
 
-    for guid, match in matches.items():
-        options.append(guid)
-        print(f'[{index + 1}] {match['normalizedName']} ({guid})')
-        index = index + 1
-    
-    _choice_ = input('> ')
+    with open(temp_file, 'w', encoding = 'utf-8') as open_file:
+        open_file.write(f'{CHECKSUM_HEADER}{checksum}", {contents[1:]}')
+        open_file.flush()
+        fsync(open_file.fileno())
 
-    if (_choice_.isdigit()):
-        _choice_ = int(_choice_)
+    replace(temp_file, f'{directory}\\{file_path}')
+    print_debug(f'Wrote file >> {file_path} <<')
+    return True
 
-        if (_choice_ > 0 and _choice_ <= len(matches)):
-            guid = options[_choice_ - 1]
-            print_debug(f'Selected item >> {matches[guid]['normalizedName']}')
-            return guid
-    
-    print_error('Invalid selection')
-    return False
+# Binary snapshots
+def snapshot_file(file_path):
+    return f'{file_path}.snapshot'
 
-def find_task(text, database):
-    print_debug(f'Searching for task >> {text} <<')
-    tasks = {}
+def snapshot_header():
+    return SNAPSHOT_MAGIC + bytes([SNAPSHOT_SCHEMA, marshal.version])
 
-    for guid, task in database['tasks'].items():
-        if (string_compare(text, task['normalizedName']) or string_compare(text, task['name']) or guid == text):
-            print_debug(f'Found matching task >> {task['normalizedName']} <<')
-            tasks[guid] = task
+# Each top-level key is marshalled on its own behind a table of offsets, so a single section can be read without the rest
+def write_snapshot(file_path, directory, data):
+    data = expand_database(data)
+    sections = [marshal.dumps(value) for value in data.values()]
+    table = {}
+    offset = 0
 
-    if (len(tasks) == 0):
-        return False
-    elif (len(tasks) == 1):
-        return next(iter(tasks))
-    else:
-        print_warning(f'Found {len(tasks)} tasks for {text}. Please choose one')
-        return disambiguate(tasks)
+    for key, section in zip(data.keys(), sections):
+        table[key] = (offset, len(section), hashlib.sha256(section).digest())
+        offset = offset + len(section)
 
-def find_station(text, database):
-    print_debug(f'Searching for hideout station >> {text} <<')
-    stations = {}
+    contents = marshal.dumps(table)
+    temp_file = f'{directory}\\{snapshot_file(file_path)}.tmp'
 
-    for guid, station in database['hideout'].items():
-        if (string_compare(text, station['normalizedName']) or guid == text):
-            print_debug(f'Found matching station >> {station['normalizedName']} <<')
-            stations[guid] = station
+    with open(temp_file, 'wb') as open_file:
+        open_file.write(snapshot_header() + hashlib.sha256(contents).digest() + len(contents).to_bytes(4, 'little'))
+        open_file.write(contents)
 
-    if (len(stations) == 0):
-        return False
-    elif (len(stations) == 1):
-        return next(iter(stations))
-    else:
-        print_warning(f'Found {len(stations)} hideout stations for {text}. Please choose one')
-        return disambiguate(stations)
+        for section in sections:
+            open_file.write(section)
 
-def find_barter(text, database):
-    print_debug(f'Searching for hideout station >> {text} <<')
-    barters = {}
+        open_file.flush()
+        fsync(open_file.fileno())
 
-    for guid, barter in database['barters'].items():
-        if (guid == text):
-            print_debug(f'Found matching barter >> {guid} <<')
-            barters[guid] = barter
+    replace(temp_file, f'{directory}\\{snapshot_file(file_path)}')
+    print_debug(f'Wrote snapshot >> {snapshot_file(file_path)} <<')
+    return True
 
-    if (len(barters) == 0):
+# Any snapshot that is missing, older than the JSON, of another schema or damaged is ignored in favour of the JSON
+def open_snapshot(file_path, directory):
+    snapshot = open_snapshot_table(file_path, directory)
+
+    if (not snapshot):
         return False
-    elif (len(barters) == 1):
-        return next(iter(barters))
-    else:
-        print_warning(f'Found {len(barters)} barters for {text}. Please choose one')
-        return disambiguate(barters)
 
-def find_craft(text, database):
-    print_debug(f'Searching for craft >> {text} <<')
-    crafts = {}
+    try:
+        with open(snapshot['path'], 'rb') as open_file:
+            open_file.seek(snapshot['start'])
+            contents = open_file.read()
+    except OSError:
+        return False
 
-    for guid, craft in database['crafts'].items():
-        if (guid == text):
-            print_debug(f'Found matching craft >> {guid} <<')
-            crafts[guid] = craft
+    file = {}
 
-    if (len(crafts) == 0):
-        return False
-    elif (len(crafts) == 1):
-        return next(iter(crafts))
-    else:
-        print_warning(f'Found {len(crafts)} crafts for {text}. Please choose one')
-        return disambiguate(crafts)
+    for key, (offset, length, checksum) in snapshot['sections'].items():
+        file[key] = decode_section(snapshot, key, contents[offset:offset + length])
 
-def find_item(text, database):
-    print_debug(f'Searching for item >> {text} <<')
-    items = {}
+        if (file[key] is False):
+            return False
 
-    for guid, item in database['items'].items():
-        if (string_compare(text, item['normalizedName']) or string_compare(text, item['shortName']) or guid == text):
-            print_debug(f'Found matching item >> {item['normalizedName']} <<')
-            items[guid] = item
+    print_debug(f'Opened snapshot >> {snapshot_file(file_path)} <<')
+    return file
 
-    if (len(items) == 0):
-        return False
-    elif (len(items) == 1):
-        return next(iter(items))
-    else:
-        print_warning(f'Found {len(items)} items for {text}. Please choose one')
-        return disambiguate(items)
+def open_snapshot_table(file_path, directory):
+    snapshot_path = f'{directory}\\{snapshot_file(file_path)}'
+    header = snapshot_header()
 
-def find_map(text, database):
-    print_debug(f'Searching for map >> {text} <<')
-    maps = {}
+    try:
+        if (path.getmtime(snapshot_path) < path.getmtime(f'{directory}\\{file_path}')):
+            print_debug(f'Snapshot is older than >> {file_path} <<')
+            return False
 
-    for guid, map in database['maps'].items():
-        if (string_compare(text, map['normalizedName']) or guid == text):
-            print_debug(f'Found matching map >> {map['normalizedName']} <<')
-            maps[guid] = map
+        with open(snapshot_path, 'rb') as open_file:
+            prefix = open_file.read(len(header) + 36)
+            contents = open_file.read(int.from_bytes(prefix[len(header) + 32:], 'little'))
+    except OSError:
+        return False
 
-    if (len(maps) == 0):
+    if (not prefix.startswith(header)):
+        print_debug('Snapshot schema does not match')
         return False
-    elif (len(maps) == 1):
-        return next(iter(maps))
-    else:
-        print_warning(f'Found {len(maps)} maps for {text}. Please choose one')
-        return disambiguate(maps)
 
-def find_trader(text, database):
-    print_debug(f'Searching for trader >> {text} <<')
-    traders = {}
+    try:
+        if (hashlib.sha256(contents).digest() != prefix[len(header):len(header) + 32]):
+            raise ValueError
+        
+        sections = marshal.loads(contents)
+    except (EOFError, ValueError, TypeError):
+        print_warning(f'{snapshot_file(file_path)} is damaged. Loading {file_path} instead')
+        return False
+
+    return {
+        'path': snapshot_path,
+        'file': file_path,
+        'start': len(prefix) + len(contents),
+        'sections': sections
+    }
 
-    for guid, trader in database['traders'].items():
-        if (string_compare(text, trader['normalizedName']) or guid == text):
-            print_debug(f'Found matching trader >> {trader['normalizedName']} <<')
-            traders[guid] = trader
+def open_snapshot_section(snapshot, key):
+    offset, length, checksum = snapshot['sections'][key]
 
-    if (len(traders) == 0):
+    try:
+        with open(snapshot['path'], 'rb') as open_file:
+            open_file.seek(snapshot['start'] + offset)
+            contents = open_file.read(length)
+    except OSError:
         return False
-    elif (len(traders) == 1):
-        return next(iter(traders))
-    else:
-        print_warning(f'Found {len(traders)} traders for {text}. Please choose one')
-        return disambiguate(traders)
 
-def create_filter(text, database):
-    filters = {}
+    print_debug(f'Read section >> {key} << from >> {snapshot_file(snapshot['file'])} <<')
+    return decode_section(snapshot, key, contents)
 
-    if (string_compare(text, 'kappa')):
-        return 'kappa'
+def decode_section(snapshot, key, contents):
+    try:
+        if (hashlib.sha256(contents).digest() != snapshot['sections'][key][2]):
+            raise ValueError
 
-    for guid, map in database['maps'].items():
-        if (string_compare(text, map['normalizedName']) or guid == text):
-            filters[guid] = map
+        return marshal.loads(contents)
+    except (EOFError, ValueError, TypeError):
+        print_warning(f'{snapshot_file(snapshot['file'])} is damaged. Loading {snapshot['file']} instead')
+        return False
 
-    for guid, trader in database['traders'].items():
-        if (string_compare(text, trader['normalizedName']) or guid == text):
-            filters[guid] = trader
+# Best of several loads from the JSON and from the snapshots, writing any snapshot first that is missing or stale
+def benchmark_snapshot(file_path, directory, repeats = 5):
+    database = open_json(file_path, directory)
 
-    if (len(filters) == 0):
+    if (not database):
         return False
-    elif (len(filters) == 1):
-        return next(iter(filters))
+
+    # Snapshots are kept for the catalogue, one per section of a split tracker. The progress overlay is small enough as JSON
+    if ('catalogue' in database.keys()):
+        files = list(database['catalogue'].values())
+        section = (open_snapshot, [database['catalogue']['traders']])
     else:
-        print_warning(f'Found {len(filters)} filter matches for {text}. Please choose one')
-        return disambiguate(filters)
+        files = [file_path]
+        section = (open_traders_section, files)
 
-def find_completable(text, database):
-    guid = find_task(text, database)
+    database = {}
 
-    if (guid):
-        return guid
+    for file in files:
+        contents = open_json(file, directory)
+
+        if (not contents):
+            return False
+
+        if (not open_snapshot(file, directory)):
+            write_snapshot(file, directory, contents)
+
+        database = database | contents
+
+    timings = {}
+
+    for label, loader, loaded in [('JSON', open_json, files), ('Snapshot', open_snapshot, files), ('Section', section[0], section[1])]:
+        times = []
+
+        for _repeat_ in range(repeats):
+            start = time.perf_counter()
+
+            for file in loaded:
+                loader(file, directory)
+
+            times.append(time.perf_counter() - start)
+
+        timings[label] = min(times)
+
+    json_size = sum([path.getsize(f'{directory}\\{file}') for file in files])
+    snapshot_size = sum([path.getsize(f'{directory}\\{snapshot_file(file)}') for file in files])
+    print(f'{len(database['items'])} items, {len(database['tasks'])} tasks, {len(database['hideout'])} hideout stations, {len(database['barters'])} barters, {len(database['crafts'])} crafts')
+    print(f'JSON: {timings['JSON'] * 1000:.1f} ms ({json_size:,} bytes)')
+    print(f'Snapshot: {timings['Snapshot'] * 1000:.1f} ms ({snapshot_size:,} bytes)')
+    print(f'Snapshot loads {timings['JSON'] / timings['Snapshot']:.1f}x faster')
+    print(f'Traders section alone: {timings['Section'] * 1000:.2f} ms')
+    return True
+
+def open_traders_section(file_path, directory):
+    return open_snapshot_section(open_snapshot_table(file_path, directory), 'traders')
+
+# Database session
+def open_session(tracker_file, directory):
+    session = {
+        'tracker_file': tracker_file,
+        'directory': directory,
+        'database': False,
+        'mtime': None,
+        'dirty': False,
+        'journal': 0,
+        'flushed': time.time(),
+        'lock': threading.RLock(),
+        'stop': threading.Event(),
+        'refresher': None,
+        'baseline': None,
+        'catalogue': set(),
+        'pending': None,
+        'manifest': {'catalogue': {}, 'shards': {}},
+        'shards': set(),
+        'storage': STORAGE_BACKEND
+    }
+
+    if (STORAGE_BACKEND not in STORAGE.keys()):
+        print_warning(f'Unknown storage backend {STORAGE_BACKEND}. Using json')
+        session['storage'] = 'json'
+
+    return session
+
+def storage(session):
+    return STORAGE[session['storage']]
+
+def database_mtime(session):
+    try:
+        return path.getmtime(f'{session['directory']}\\{storage(session)['file'](session['tracker_file'])}')
+    except OSError:
+        return None
+
+# Commands which only need some sections name them, the rest of the database stays on disk until asked for
+def load_database(session, sections = None):
+    mtime = database_mtime(session)
+
+    if (session['database'] and mtime == session['mtime']):
+        return materialize(session, session['database'], sections)
+
+    if (session['database'] and session['dirty']):
+        print_warning(f'{session['tracker_file']} was changed outside of this session. Unsaved changes will overwrite it')
+        session['mtime'] = mtime
+        return materialize(session, session['database'], sections)
+
+    print_debug(f'Loading >> {session['tracker_file']} << into the session')
+    session['mtime'] = mtime
+    session['dirty'] = False
+    session['catalogue'] = set()
+    session['journal'] = 0
+    session['pending'] = None
+    session['manifest'] = {'catalogue': {}, 'shards': {}}
+    session['shards'] = set()
+    session['database'] = storage(session)['read'](session, sections)
+
+    if (session['database'] and not session['pending']):
+        calculate_missing_sources(session, session['database'])
+
+    return session['database']
+
+def calculate_missing_sources(session, database):
+    if (any(['need_sources' not in item.keys() for item in database['items'].values()])):
+        print_debug('Calculating need by source')
+        calculate_sources(database)
+        session['catalogue'].add('items')
+
+    return True
+
+def save_database(session, database, changes = None):
+    with session['lock']:
+        # A replaced database has nothing left to read from the old catalogue
+        if (database is not session['database']):
+            session['pending'] = None
+
+        session['database'] = database
+        session['dirty'] = True
+        session['catalogue'] = session['catalogue'] | catalogue_changed(database, changes)
+        session['shards'] = session['shards'] | changed_shards(changes)
+        bump_generations(changes)
+        update_task_graph(database, changes)
+
+        if (changes is None):
+            return flush_database(session, force = True)
+
+        return storage(session)['record'](session, database, changes)
+
+def flush_database(session, force = False):
+    with session['lock']:
+        if (not session['dirty'] or not session['database']):
+            return False
+
+        if (not force and session['journal'] < JOURNAL_LIMIT and time.time() - session['flushed'] < FLUSH_INTERVAL):
+            print_debug('Deferring database write')
+            return False
+
+        storage(session)['write'](session)
+        session['mtime'] = database_mtime(session)
+        session['dirty'] = False
+        session['shards'] = set()
+        session['flushed'] = time.time()
+        return True
+
+# JSON storage, a catalogue and a progress overlay with a journal of changes since they were written
+def json_file(tracker_file):
+    return tracker_file
+
+def read_json(session, sections = None):
+    # Replaying the journal can touch any section, so a tracker with one is read whole
+    if (sections is not None and not path.exists(journal_file(session))):
+        return read_sections(session, sections)
+
+    database, session['baseline'], overlay = read_tracker(session['tracker_file'], session['directory'])
+
+    if (overlay):
+        session['manifest'] = {'catalogue': overlay['catalogue'], 'shards': overlay.get('shards', {})}
+
+    if (database):
+        session['journal'] = replay_journal(session, database)
+        session['dirty'] = session['journal'] > 0
+
+    return database
+
+def record_json(session, database, changes):
+    return write_journal(session, journal_records(database, changes))
+
+def write_json(session):
+    database = session['database']
+    directory = session['directory']
+    tracker_file = session['tracker_file']
+
+    # A tracker read whole from a single file has all of its catalogue split out
+    if (session['baseline'] is None):
+        session['catalogue'] = set(catalogue_keys(database))
+        session['baseline'] = {}
+
+        if (path.exists(f'{directory}\\{snapshot_file(tracker_file)}')):
+            remove(f'{directory}\\{snapshot_file(tracker_file)}')
+
+    # Only the catalogue sections whose game data or prices changed are rewritten. Each progress shard is relative to its section so follows it, as do any the manifest lacks
+    session['shards'] = session['shards'] | (session['catalogue'] & set(SHARDS))
+    session['shards'] = session['shards'] | {key for key in SHARDS if key not in session['manifest']['shards'] or not path.exists(f'{directory}\\{session['manifest']['shards'][key]['file']}')}
+
+    if (not materialize(session, database, session['catalogue'] | session['shards'])):
+        return False
+
+    catalogue = dict(session['manifest']['catalogue'])
+
+    for key in sorted(session['catalogue']):
+        catalogue[key] = write_catalogue(tracker_file, directory, key, database[key])
+        session['baseline'] = session['baseline'] | progress_of(database, [key])
+
+    # Sections a new import no longer has are dropped, and their files go once the manifest no longer names them
+    if (not session['pending']):
+        for key in [key for key in catalogue.keys() if key not in database.keys()]:
+            del catalogue[key]
+
+    session['catalogue'] = set()
+    write_overlay(session, overlay_of(database, session['baseline'], catalogue, session['shards']))
+    truncate_journal(session)
+    return True
+
+# SQLite storage, with every saved change applied as row updates in one transaction
+def sqlite_file(tracker_file):
+    return f'{path.splitext(tracker_file)[0]}.sqlite'
+
+def connect_sqlite(session):
+    connection = sqlite3.connect(f'{session['directory']}\\{sqlite_file(session['tracker_file'])}')
+    connection.executescript(SQLITE_SCHEMA)
+    return connection
+
+# Each entity is one row holding its progress and the rest of it apart, so most saves only rewrite the progress
+def progress_data(section, entity):
+    return json.dumps({field: entity[field] for field in PROGRESS_FIELDS.get(section, []) if field in entity})
+
+def static_data(section, entity):
+    fields = PROGRESS_FIELDS.get(section, [])
+    return json.dumps({field: value for field, value in expand_entity(section, entity).items() if field not in fields})
+
+def entity_row(section, guid, entity):
+    return (section, guid, progress_data(section, entity), static_data(section, entity))
+
+# A tracker not yet kept in SQLite is read from JSON and written out in full at the next flush
+def read_sqlite(session, sections = None):
+    if (not path.exists(f'{session['directory']}\\{sqlite_file(session['tracker_file'])}')):
+        print_debug(f'Converting >> {session['tracker_file']} << to SQLite')
+        database = read_json(session)
+        session['dirty'] = bool(database)
+        return database
+
+    database = {section: {} for section in ['tasks', 'hideout', 'barters', 'crafts', 'items', 'maps', 'traders']}
+
+    with closing(connect_sqlite(session)) as connection:
+        for key, value in connection.execute('SELECT key, value FROM meta'):
+            database[key] = json.loads(value)
+
+        for section, guid, progress, data in connection.execute('SELECT section, guid, progress, data FROM entities ORDER BY rowid'):
+            database[section][guid] = compact_entity(section, json.loads(data) | json.loads(progress))
+
+        if (connection.execute('PRAGMA user_version').fetchone()[0] != SQLITE_VERSION):
+            print_debug(f'Filling the query tables of >> {sqlite_file(session['tracker_file'])} <<')
+
+            with connection:
+                write_queries(connection, database)
+
+    print_debug(f'Opened >> {sqlite_file(session['tracker_file'])} <<')
+    return database
+
+def record_sqlite(session, database, changes):
+    if (not path.exists(f'{session['directory']}\\{sqlite_file(session['tracker_file'])}')):
+        return flush_database(session, force = True)
+
+    rewrite = False
+
+    with closing(connect_sqlite(session)) as connection:
+        with connection:
+            for change in changes:
+                if (type(change) is not tuple):
+                    connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (change, json.dumps(database[change])))
+                    continue
+
+                section, guid = change[0], change[1]
+                entity = database[section][guid]
+
+                if (catalogue_changed(database, [change])):
+                    connection.execute('UPDATE entities SET progress = ?, data = ? WHERE section = ? AND guid = ?', entity_row(section, guid, entity)[2:] + (section, guid))
+                    rewrite = rewrite or section != 'items'
+                else:
+                    connection.execute('UPDATE entities SET progress = ? WHERE section = ? AND guid = ?', (progress_data(section, entity), section, guid))
+
+                record_queries(connection, section, guid, entity)
+
+            # Requirements and task fields other than progress only change with the catalogue, so the query tables are filled again
+            if (rewrite):
+                write_queries(connection, database)
+
+    session['mtime'] = database_mtime(session)
+    session['dirty'] = False
+    print_debug(f'Updated >> {len(changes)} << rows')
+    return True
+
+def write_sqlite(session):
+    database = materialize(session, session['database'])
+
+    with closing(connect_sqlite(session)) as connection:
+        with connection:
+            for table in ['meta', 'entities']:
+                connection.execute(f'DELETE FROM {table}')
+
+            connection.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [(key, json.dumps(value)) for key, value in database.items() if key not in ['tasks', 'hideout', 'barters', 'crafts', 'items', 'maps', 'traders']])
+            connection.executemany('INSERT INTO entities VALUES (?, ?, ?, ?)', [entity_row(section, guid, entity) for section in ['tasks', 'hideout', 'barters', 'crafts', 'items', 'maps', 'traders'] for guid, entity in database[section].items()])
+            write_queries(connection, database)
+
+    session['catalogue'] = set()
+    truncate_journal(session)
+    print_debug(f'Wrote >> {sqlite_file(session['tracker_file'])} <<')
+    return True
+
+# Query tables
+def query_rows(database):
+    rows = {table: [] for table in SQLITE_TABLES}
+
+    for ordinal, (guid, item) in enumerate(database['items'].items()):
+        rows['items'].append((guid, ordinal) + tuple([item[counter] for counter in SQLITE_COUNTERS]))
+
+    for ordinal, (guid, task) in enumerate(database['tasks'].items()):
+        rows['tasks'].append((guid, ordinal, task['status'], task['tracked'], task['minPlayerLevel'], task['trader']['id'], task['kappaRequired']))
+        rows['task_maps'].extend([(guid, map) for map in task['maps']])
+        rows['task_requirements'].extend([(guid, prerequisite) for prerequisite in task['taskRequirements']])
+
+    for section in ['barters', 'crafts']:
+        for ordinal, (guid, trade) in enumerate(database[section].items()):
+            rows[section].append((guid, ordinal, trade['status'], trade['tracked']))
+
+    for section in ['tasks', 'hideout', 'barters', 'crafts']:
+        for ordinal, (guid, entity) in enumerate(database[section].items()):
+            rows['requirements'].extend([(section, guid, ordinal) + consumer for consumer in entity_consumers(section, entity)])
+
+    return rows
+
+def write_queries(connection, database):
+    for table, rows in query_rows(database).items():
+        connection.execute(f'DELETE FROM {table}')
+
+        if (rows):
+            connection.executemany(f'INSERT INTO {table} VALUES ({', '.join(['?'] * len(rows[0]))})', rows)
+
+    connection.execute(f'PRAGMA user_version = {SQLITE_VERSION}')
+    return True
+
+# A change to the progress of one entity is a single row UPDATE
+def record_queries(connection, section, guid, entity):
+    if (section == 'items'):
+        connection.execute(f'UPDATE items SET {', '.join([f'{counter} = ?' for counter in SQLITE_COUNTERS])} WHERE guid = ?', tuple([entity[counter] for counter in SQLITE_COUNTERS]) + (guid,))
+    elif (section in ['tasks', 'barters', 'crafts']):
+        connection.execute(f'UPDATE {section} SET status = ?, tracked = ? WHERE guid = ?', (entity['status'], entity['tracked'], guid))
+
+    return True
+
+# Queries only go to SQLite once every saved change is in it, otherwise the commands scan the database in memory
+def queryable(session):
+    return session['storage'] == 'sqlite' and not session['dirty'] and path.exists(f'{session['directory']}\\{sqlite_file(session['tracker_file'])}')
+
+def select_sqlite(session, query, parameters):
+    with closing(connect_sqlite(session)) as connection:
+        return [row[0] for row in connection.execute(query, parameters)]
+
+STORAGE = {
+    'json': {
+        'file': json_file,
+        'read': read_json,
+        'record': record_json,
+        'write': write_json
+    },
+    'sqlite': {
+        'file': sqlite_file,
+        'read': read_sqlite,
+        'record': record_sqlite,
+        'write': write_sqlite
+    }
+}
+
+# Catalogue and progress overlay. Each top-level section of the catalogue is a file of its own, named in the manifest
+def catalogue_file(tracker_file, key, checksum):
+    return f'{tracker_file}.catalogue.{key}.{checksum[:16]}'
+
+# Named after their contents like the shards, so a write never touches a file the manifest in place still names
+def write_catalogue(tracker_file, directory, key, value):
+    data = expand_database({key: value})
+    contents = json.dumps(data)
+    file_path = catalogue_file(tracker_file, key, hashlib.sha256(contents.encode('utf-8')).hexdigest())
+    write_contents(file_path, directory, contents)
+
+    if (type(value) is dict):
+        write_snapshot(file_path, directory, data)
+
+    return file_path
+
+def catalogue_keys(database):
+    return [key for key in database.keys() if key not in ['version'] + PROGRESS_KEYS]
+
+def open_catalogue(file_path, directory, key):
+    file = open_snapshot(file_path, directory)
+
+    if (not file):
+        file = open_json(file_path, directory)
+
+    if (not file or key not in file.keys()):
+        return False
+
+    return compact_database(file)[key]
+
+# Trackers saved as one file are returned whole with no baseline or overlay, so the next write splits them
+def read_tracker(file_path, directory):
+    file = open_overlay(file_path, directory)
+
+    if (not file or 'catalogue' not in file.keys()):
+        return file, None, None
+
+    database = {'version': file['version']}
+
+    for key, catalogue in file['catalogue'].items():
+        database[key] = open_catalogue(catalogue, directory, key)
+
+        if (database[key] is False):
+            print_error(f'Failed to open {catalogue} for {file_path}')
+            return False, None, None
+
+    baseline = progress_of(database)
+    apply_overlay(database, file)
+    return database, baseline, file
+
+def progress_of(database, sections = None):
+    progress = {}
+
+    for section, fields in PROGRESS_FIELDS.items():
+        if (sections is not None and section not in sections):
+            continue
+
+        progress[section] = {guid: {field: entity[field] for field in fields if field in entity} for guid, entity in database[section].items()}
+
+    return progress
+
+# Only entities whose progress differs from the catalogue are kept in the overlay, of just the given shards if any
+def overlay_of(database, baseline, catalogue, shards = None):
+    overlay = {
+        'version': database['version'],
+        'catalogue': catalogue,
+        'progress': {}
+    }
+
+    for section, fields in PROGRESS_FIELDS.items():
+        if (shards is not None and section not in shards):
+            continue
+
+        overlay['progress'][section] = {}
+
+        for guid, entity in database[section].items():
+            values = {field: entity[field] for field in fields if field in entity}
+
+            if (values != baseline[section].get(guid)):
+                overlay['progress'][section][guid] = values
+
+    for key in PROGRESS_KEYS:
+        if (shards is None or key in shards):
+            overlay[key] = database[key]
+
+    return overlay
+
+def apply_overlay(database, overlay, sections = None):
+    for section, entities in overlay['progress'].items():
+        if (sections is not None and section not in sections):
+            continue
+
+        for guid, values in entities.items():
+            if (guid in database[section].keys()):
+                database[section][guid].update(values)
+
+    if (sections is None):
+        for key in PROGRESS_KEYS:
+            database[key] = overlay[key]
+
+    return database
+
+# Overlay shards
+def shard_file(tracker_file, key, checksum):
+    return f'{tracker_file}.shard.{key}.{checksum[:16]}'
+
+def changed_shards(changes):
+    if (changes is None):
+        return set(SHARDS)
+
+    return {change[0] if type(change) is tuple else change for change in changes} & set(SHARDS)
+
+# A manifest is read back into the overlay it was written from, with only the named shards if any are given
+def open_overlay(file_path, directory, keys = None):
+    file = open_database(file_path, directory)
+
+    if (not file or 'shards' not in file.keys()):
+        return file
+
+    overlay = {
+        'version': file['version'],
+        'catalogue': file['catalogue'],
+        'progress': {},
+        'shards': file['shards']
+    }
+
+    for key in file['shards'].keys():
+        if ((keys is None or key in keys) and not open_shard(overlay, key, directory)):
+            return False
+
+    return overlay
+
+def open_shard(overlay, key, directory):
+    shard = overlay['shards'][key]
+
+    try:
+        with open(f'{directory}\\{shard['file']}', 'r', encoding = 'utf-8') as open_file:
+            contents = open_file.read()
+    except FileNotFoundError:
+        print_error(f'{shard['file']} is missing. Please restore from a backup')
+        return False
+
+    if (hashlib.sha256(contents.encode('utf-8')).hexdigest() != shard['sha256']):
+        print_error(f'{shard['file']} is damaged (checksum mismatch). Please restore from a backup')
+        return False
+
+    if (key in PROGRESS_FIELDS.keys()):
+        overlay['progress'][key] = json.loads(contents)
+    else:
+        overlay[key] = json.loads(contents)
+
+    print_debug(f'Opened shard >> {shard['file']} <<')
+    return True
+
+# New shards are written beside the old ones and the manifest naming them replaced last, so a crash leaves the previous set whole
+def write_overlay(session, overlay):
+    directory = session['directory']
+    tracker_file = session['tracker_file']
+    manifest = {
+        'version': overlay['version'],
+        'catalogue': overlay['catalogue'],
+        'shards': dict(session['manifest']['shards'])
+    }
+
+    for key in SHARDS:
+        if (key in overlay['progress'].keys()):
+            contents = json.dumps(overlay['progress'][key])
+        elif (key in overlay.keys()):
+            contents = json.dumps(overlay[key])
+        else:
+            continue
+
+        checksum = hashlib.sha256(contents.encode('utf-8')).hexdigest()
+        manifest['shards'][key] = {
+            'file': shard_file(tracker_file, key, checksum),
+            'sha256': checksum
+        }
+
+        with open(f'{directory}\\{manifest['shards'][key]['file']}.tmp', 'w', encoding = 'utf-8') as open_file:
+            open_file.write(contents)
+            open_file.flush()
+            fsync(open_file.fileno())
+
+        replace(f'{directory}\\{manifest['shards'][key]['file']}.tmp', f'{directory}\\{manifest['shards'][key]['file']}')
+        print_debug(f'Wrote shard >> {manifest['shards'][key]['file']} <<')
+
+    # Files of the catalogue and shards the new manifest no longer names are only removed once it is in place
+    write_database(tracker_file, directory, manifest)
+    session['manifest'] = {'catalogue': manifest['catalogue'], 'shards': manifest['shards']}
+    current = [shard['file'] for shard in manifest['shards'].values()] + [file for catalogue in manifest['catalogue'].values() for file in [catalogue, snapshot_file(catalogue)]]
+
+    for file in listdir(directory):
+        if ((file.startswith(f'{tracker_file}.shard.') or file.startswith(f'{tracker_file}.catalogue.')) and file not in current):
+            remove(f'{directory}\\{file}')
+
+    return True
+
+# A split tracker opens with just its manifest and player shards, and sections of the catalogue are read as they are needed
+def read_sections(session, sections):
+    file = open_overlay(session['tracker_file'], session['directory'], PROGRESS_KEYS)
+
+    if (not file or 'catalogue' not in file.keys()):
+        session['baseline'] = None
+        return file
+
+    database = {key: file[key] for key in ['version'] + PROGRESS_KEYS}
+    session['manifest'] = {'catalogue': file['catalogue'], 'shards': file.get('shards', {})}
+    session['baseline'] = {}
+    session['pending'] = {
+        'overlay': file
+    }
+    return materialize(session, database, sections)
+
+def materialize(session, database, sections = None):
+    pending = session['pending']
+
+    if (not pending or not database):
+        return database
+
+    catalogue = session['manifest']['catalogue']
+
+    for key in catalogue.keys():
+        if (key in database.keys() or (sections is not None and key not in sections)):
+            continue
+
+        value = open_catalogue(catalogue[key], session['directory'], key)
+
+        if (value is False):
+            print_error(f'Failed to open {catalogue[key]} for {session['tracker_file']}')
+            return False
+
+        if (key in session['manifest']['shards'].keys() and key not in pending['overlay']['progress'].keys() and key in PROGRESS_FIELDS.keys()):
+            if (not open_shard(pending['overlay'], key, session['directory'])):
+                return False
+
+        database[key] = value
+        session['baseline'] = session['baseline'] | progress_of(database, [key])
+        apply_overlay(database, pending['overlay'], [key])
+
+    if (all([key in database.keys() for key in catalogue.keys()])):
+        print_debug(f'Finished reading the catalogue of >> {session['tracker_file']} <<')
+        session['pending'] = None
+        calculate_missing_sources(session, database)
+
+    return database
+
+# Anything beyond the progress of entities and the player, such as prices, lives in the catalogue. Returns the sections and keys of it changed
+def catalogue_changed(database, changes):
+    if (changes is None):
+        return set(catalogue_keys(database))
+
+    changed = set()
+
+    for change in changes:
+        if (type(change) is tuple):
+            if (len(change) > 2 and not set(change[2]) <= set(PROGRESS_FIELDS[change[0]])):
+                changed.add(change[0])
+        elif (change not in PROGRESS_KEYS):
+            changed.add(change)
+
+    return changed
+
+# A full save may have changed anything, otherwise only the sections named by the changes
+def bump_generations(changes):
+    if (changes is None):
+        sections = GENERATIONS.keys()
+    else:
+        sections = {change[0] for change in changes if type(change) is tuple}
+
+    for section in sections:
+        GENERATIONS[section] = GENERATIONS[section] + 1
+
+    return True
+
+# Write-ahead journal of changes since the last full write
+def journal_file(session):
+    return f'{session['directory']}\\{session['tracker_file']}.journal'
+
+def journal_records(database, changes):
+    records = []
+
+    for change in changes:
+        if (type(change) is tuple):
+            section, guid = change[0], change[1]
+            entity = database[section][guid]
+
+            # Changes default to the entity's progress, but may name the fields which changed
+            if (len(change) > 2):
+                fields = change[2]
+            else:
+                fields = PROGRESS_FIELDS[section]
+
+            values = {field: entity[field] for field in fields if field in entity}
+            records.append({'section': section, 'guid': guid, 'values': values})
+        else:
+            records.append({'key': change, 'value': database[change]})
+
+    return records
+
+def write_journal(session, records):
+    with open(journal_file(session), 'a', encoding = 'utf-8') as open_file:
+        for record in records:
+            open_file.write(json.dumps(record) + '\n')
+
+        open_file.flush()
+        fsync(open_file.fileno())
+
+    session['journal'] = session['journal'] + len(records)
+    print_debug(f'Journaled >> {len(records)} << records')
+    return True
+
+def replay_journal(session, database):
+    count = 0
+
+    try:
+        with open(journal_file(session), 'r', encoding = 'utf-8') as open_file:
+            lines = open_file.readlines()
+    except FileNotFoundError:
+        return 0
+
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            print_warning('Discarded an incomplete journal record')
+            break
+
+        if ('key' in record):
+            database[record['key']] = record['value']
+            session['catalogue'] = session['catalogue'] | catalogue_changed(database, [record['key']])
+            session['shards'] = session['shards'] | ({record['key']} & set(SHARDS))
+        elif (record['guid'] in database[record['section']]):
+            database[record['section']][record['guid']].update(record['values'])
+            session['shards'].add(record['section'])
+            session['catalogue'] = session['catalogue'] | catalogue_changed(database, [(record['section'], record['guid'], list(record['values'].keys()))])
+
+        count = count + 1
+
+    if (count > 0):
+        print_warning(f'Recovered {count} unsaved changes from the journal')
+
+    return count
+
+def truncate_journal(session):
+    if (path.exists(journal_file(session))):
+        remove(journal_file(session))
+        print_debug('Removed journal')
+
+    session['journal'] = 0
+    return True
+
+# Rollback for commands which fail part way through
+def entity_references(database, section, guid):
+    references = [(section, guid)]
+    entity = database[section][guid]
+    item_guids = [requirement.item for requirement in entity_requirements(section, entity)]
+
+    if (section == 'tasks'):
+        item_guids.extend(task_keys(entity))
+
+    for item_guid in item_guids:
+        if (('items', item_guid) not in references):
+            references.append(('items', item_guid))
+
+    return references
+
+def section_of(database, guid):
+    for section in ['tasks', 'hideout', 'barters', 'crafts', 'items']:
+        if (guid in database[section]):
+            return section
+
+    return False
+
+def checkpoint(database, references):
+    snapshot = {}
+
+    for section, guid in references:
+        entity = database[section][guid]
+        snapshot[(section, guid)] = {field: entity[field] for field in PROGRESS_FIELDS[section] if field in entity}
+
+    return snapshot
+
+def rollback(database, snapshot):
+    for (section, guid), fields in snapshot.items():
+        database[section][guid].update(fields)
+
+    print_debug(f'Rolled back >> {len(snapshot)} << entities')
+    return True
+
+# Find unique functions (return GUID)
+def disambiguate(matches):
+    options = []
+    index = 0
+
+    for guid, match in matches.items():
+        options.append(guid)
+
+        # Barters and crafts have no names, their GUID is all there is to choose by
+        if ('normalizedName' in match.keys()):
+            print(f'[{index + 1}] {match['normalizedName']} ({guid})')
+        else:
+            print(f'[{index + 1}] {guid}')
+
+        index = index + 1
+    
+    _choice_ = input('> ')
+
+    if (_choice_.isdigit()):
+        _choice_ = int(_choice_)
+
+        if (_choice_ > 0 and _choice_ <= len(matches)):
+            guid = options[_choice_ - 1]
+            print_debug(f'Selected item >> {guid}')
+            return guid
+    
+    print_error('Invalid selection')
+    return False
+
+def find_task(text, database, confirm = False):
+    print_debug(f'Searching for task >> {text} <<')
+    tasks = {}
+
+    for guid in lookup(database, 'tasks', text):
+        task = database['tasks'][guid]
+        print_debug(f'Found matching task >> {task['normalizedName']} <<')
+        tasks[guid] = task
+
+    if (len(tasks) == 0):
+        return False
+    elif (len(tasks) == 1):
+        return next(iter(tasks))
+    else:
+        return choose(text, database, tasks, 'tasks', confirm)
+
+def find_station(text, database, confirm = False):
+    print_debug(f'Searching for hideout station >> {text} <<')
+    stations = {}
+
+    for guid in lookup(database, 'hideout', text):
+        station = database['hideout'][guid]
+        print_debug(f'Found matching station >> {station['normalizedName']} <<')
+        stations[guid] = station
+
+    if (len(stations) == 0):
+        return False
+    elif (len(stations) == 1):
+        return next(iter(stations))
+    else:
+        return choose(text, database, stations, 'hideout stations', confirm)
+
+def find_barter(text, database):
+    print_debug(f'Searching for barter >> {text} <<')
+    barters = {}
+
+    if (text not in database['barters'].keys() and not is_guid_prefix(text)):
+        return False
+
+    for guid in guid_lookup(database, 'barters', text):
+        print_debug(f'Found matching barter >> {guid} <<')
+        barters[guid] = database['barters'][guid]
+
+    if (len(barters) == 0):
+        return False
+    elif (len(barters) == 1):
+        return next(iter(barters))
+    else:
+        print_warning(f'Found {len(barters)} barters for {text}. Please choose one')
+        return disambiguate(barters)
+
+def find_craft(text, database):
+    print_debug(f'Searching for craft >> {text} <<')
+    crafts = {}
+
+    if (text not in database['crafts'].keys() and not is_guid_prefix(text)):
+        return False
+
+    for guid in guid_lookup(database, 'crafts', text):
+        print_debug(f'Found matching craft >> {guid} <<')
+        crafts[guid] = database['crafts'][guid]
+
+    if (len(crafts) == 0):
+        return False
+    elif (len(crafts) == 1):
+        return next(iter(crafts))
+    else:
+        print_warning(f'Found {len(crafts)} crafts for {text}. Please choose one')
+        return disambiguate(crafts)
+
+# A GUID prefix is looked up in every section the command accepts at once, so one shared by entities of different sections is never
+# taken as the first section's. Returns None when the text names something or starts no GUID, for the finders of each section to try
+def find_guid(text, database, sections):
+    if (not is_guid_prefix(text) or any([lookup(database, section, text, prefixes = False) for section in sections])):
+        return None
+
+    matches = {guid: database[section][guid] for section in sections for guid in guid_lookup(database, section, text)}
+
+    if (len(matches) == 0):
+        return None
+    elif (len(matches) == 1):
+        return next(iter(matches))
+    else:
+        print_warning(f'Found {len(matches)} GUIDs starting with {text}. Please choose one')
+        return disambiguate(matches)
+
+def find_item(text, database):
+    print_debug(f'Searching for item >> {text} <<')
+    items = {}
+
+    for guid in lookup(database, 'items', text):
+        item = database['items'][guid]
+        print_debug(f'Found matching item >> {item['normalizedName']} <<')
+        items[guid] = item
+
+    if (len(items) == 0):
+        return suggest(text, database, ['items'], 'items', confirm = True)
+    elif (len(items) == 1):
+        return next(iter(items))
+    else:
+        return choose(text, database, items, 'items', confirm = True)
+
+def find_map(text, database):
+    print_debug(f'Searching for map >> {text} <<')
+    maps = {}
+
+    for guid in lookup(database, 'maps', text):
+        map = database['maps'][guid]
+        print_debug(f'Found matching map >> {map['normalizedName']} <<')
+        maps[guid] = map
+
+    if (len(maps) == 0):
+        return False
+    elif (len(maps) == 1):
+        return next(iter(maps))
+    else:
+        return choose(text, database, maps, 'maps')
+
+def find_trader(text, database):
+    print_debug(f'Searching for trader >> {text} <<')
+    traders = {}
+
+    for guid in lookup(database, 'traders', text):
+        trader = database['traders'][guid]
+        print_debug(f'Found matching trader >> {trader['normalizedName']} <<')
+        traders[guid] = trader
+
+    if (len(traders) == 0):
+        return suggest(text, database, ['traders'], 'traders')
+    elif (len(traders) == 1):
+        return next(iter(traders))
+    else:
+        return choose(text, database, traders, 'traders')
+
+def create_filter(text, database):
+    filters = {}
+
+    if (string_compare(text, 'kappa')):
+        return 'kappa'
+
+    for guid in lookup(database, 'maps', text):
+        filters[guid] = database['maps'][guid]
+
+    for guid in lookup(database, 'traders', text):
+        filters[guid] = database['traders'][guid]
+
+    if (len(filters) == 0):
+        return suggest(text, database, ['maps', 'traders'], 'filter matches')
+    elif (len(filters) == 1):
+        return next(iter(filters))
+    else:
+        return choose(text, database, filters, 'filter matches')
+
+def find_completable(text, database):
+    guid = find_guid(text, database, ['tasks', 'hideout', 'barters', 'crafts'])
+
+    if (guid is not None):
+        return guid
+
+    guid = find_task(text, database, confirm = True)
+
+    if (guid):
+        return guid
     
-    guid = find_station(text, database)
+    guid = find_station(text, database, confirm = True)
 
     if (guid):
         return guid
@@ -786,9 +2233,14 @@ def find_completable(text, database):
     if (guid):
         return guid
     
-    return False
+    return suggest(text, database, ['tasks', 'hideout'], 'tasks or hideout stations', confirm = True)
 
 def find_restartable(text, database):
+    guid = find_guid(text, database, ['barters', 'crafts'])
+
+    if (guid is not None):
+        return guid
+
     guid = find_barter(text, database)
 
     if (guid):
@@ -816,27 +2268,472 @@ def task_to_map(task):
 
 # String functions
 def normalize(text):
-    unwanted_strings = ['', '.', '(', ')', '+', '=', '\'', '"', ',', '\\', '/', '?', '#', '$', '&', '!', '@', '[', ']', '{', '}', '-', '_']
-    normalized = text.lower()
-    normalized = re.sub('-', ' ', normalized)
-
-    for string in unwanted_strings:
-        normalized = normalized.replace(string, '')
-    
-    normalized = re.sub(' +', ' ', normalized)
-    return normalized
+    return SPACES.sub(' ', text.lower().translate(NORMALIZE_TABLE))
 
 def string_compare(comparable, comparator: str):
     comparable_words = normalize(comparable).split(' ')
     comparator_words = normalize(comparator).split(' ')
 
-    for comparable_word in comparable_words:
-        if (comparable_word not in comparator_words and not comparator.lower().replace('-', '').startswith(comparable.lower().replace('-', '')) and not comparator.lower().replace('-', ' ').startswith(comparable.lower().replace('-', ' '))):
-            return False
+    # The prefix tests do not depend on the word being compared, so either passes for every word
+    if (not comparator.lower().replace('-', '').startswith(comparable.lower().replace('-', '')) and not comparator.lower().replace('-', ' ').startswith(comparable.lower().replace('-', ' '))):
+        for comparable_word in comparable_words:
+            if (comparable_word not in comparator_words):
+                return False
 
     print_debug(f'>> {comparable_words} << == >> {comparator_words} <<')
     return True
 
+# Normalized forms of an entity's names, stored with it at import so lookups never normalize the catalogue
+def search_forms(entity, fields):
+    forms = {}
+
+    for field in fields:
+        forms[field] = {
+            'tokens': normalize(entity[field]).split(' '),
+            'joined': entity[field].lower().replace('-', ''),
+            'spaced': entity[field].lower().replace('-', ' ')
+        }
+
+    return forms
+
+def add_search_forms(entity, section):
+    entity['search'] = search_forms(entity, INDEXED_FIELDS[section])
+    return entity
+
+# Name index
+def current_index(database):
+    if (INDEX['database'] is not database):
+        INDEX['database'] = database
+        INDEX['sections'] = {}
+        INDEX['consumers'] = None
+
+    return INDEX
+
+def section_index(database, section):
+    if (section not in current_index(database)['sections'].keys()):
+        INDEX['sections'][section] = build_index(database, section)
+
+    return INDEX['sections'][section]
+
+# The consumers come from every task, station, barter and craft, so they are only built once all four are loaded
+def item_consumers(database):
+    if (current_index(database)['consumers'] is None):
+        INDEX['consumers'] = build_consumers(database)
+
+    return INDEX['consumers']
+
+def build_index(database, section):
+    print_debug(f'Building name index for >> {section} <<')
+    fields = INDEXED_FIELDS[section]
+    index = {
+        'order': {},
+        'guids': sorted(database[section].keys()),
+        'fields': {}
+    }
+
+    for field in fields:
+        index['fields'][field] = {
+            'tokens': {},
+            'joined': [],
+            'spaced': [],
+            'trigrams': {},
+            'grams': {}
+        }
+
+    for position, (guid, entity) in enumerate(database[section].items()):
+        index['order'][guid] = position
+
+        # Databases imported before search forms were stored fall back to normalizing here
+        if ('search' in entity.keys()):
+            forms = entity['search']
+        else:
+            forms = search_forms(entity, fields)
+
+        for field in fields:
+            field_index = index['fields'][field]
+
+            for token in forms[field]['tokens']:
+                field_index['tokens'].setdefault(token, set()).add(guid)
+
+            # The two prefix forms string_compare tries against the raw text
+            field_index['joined'].append((forms[field]['joined'], guid))
+            field_index['spaced'].append((forms[field]['spaced'], guid))
+
+            # The whole name and, for longer names, each word on its own so a misspelt word still scores well
+            tokens = forms[field]['tokens']
+            grams = [trigrams(' '.join(tokens))]
+
+            if (len(tokens) > 1):
+                grams.extend([trigrams(token) for token in tokens])
+
+            field_index['grams'][guid] = grams
+
+            for gram in set().union(*grams):
+                field_index['trigrams'].setdefault(gram, set()).add(guid)
+
+    for field_index in index['fields'].values():
+        field_index['joined'].sort()
+        field_index['spaced'].sort()
+
+    return index
+
+# Every task, station, barter and craft which requires or rewards an item, keyed by item GUID
+def build_consumers(database):
+    consumers = {}
+
+    for section in ['tasks', 'hideout', 'barters', 'crafts']:
+        for guid, entity in database[section].items():
+            for item_guid, count, fir, role in entity_consumers(section, entity):
+                add_consumer(consumers, item_guid, section, guid, count, fir, role)
+
+    print_debug(f'Indexed consumers of >> {len(consumers)} << items')
+    return consumers
+
+# Each item an entity requires or rewards as (item GUID, count, FIR, role). Every key a task needs is one required
+def entity_consumers(section, entity):
+    consumers = [(requirement.item, requirement.count, requirement.fir, 'required') for requirement in entity_requirements(section, entity)]
+
+    if (section == 'tasks'):
+        consumers.extend([(key, 1, False, 'required') for key in task_keys(entity)])
+    elif (section in ['barters', 'crafts']):
+        consumers.extend([(reward.item, reward.count, False, 'reward') for reward in entity['rewardItems']])
+
+    return consumers
+
+def add_consumer(consumers, item_guid, section, guid, count, fir, role):
+    consumers.setdefault(item_guid, []).append({
+        'section': section,
+        'guid': guid,
+        'count': count,
+        'fir': fir,
+        'role': role
+    })
+    return consumers
+
+def invalidate_index():
+    INDEX['database'] = None
+    TASK_GRAPH['database'] = None
+    return True
+
+# Compact structure
+# Hideout requirements carry found in raid as an attribute
+def requirement_fir(requirement):
+    for attribute in requirement['attributes']:
+        if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
+            return True
+
+    return False
+
+def compact_field(field, value):
+    # None, or already compact
+    if (type(value) is not list):
+        return value
+
+    if (field == 'taskRequirements'):
+        return tuple([prereq['id'] if 'id' in prereq else prereq['task']['id'] for prereq in value])
+
+    if (field == 'neededKeys'):
+        return tuple([tuple([key['id'] for key in _key_['keys']]) for _key_ in value])
+
+    if (field == 'itemRequirements'):
+        return tuple([StationRequirement(requirement['id'], requirement['item']['id'], requirement['count'], requirement_fir(requirement), tuple([(attribute['type'], attribute['value']) for attribute in requirement['attributes']])) for requirement in value])
+
+    if (field == 'stationLevelRequirements'):
+        return tuple([prereq['station']['id'] + '-' + str(prereq['level']) for prereq in value])
+
+    return tuple([Requirement(requirement['item']['id'], requirement['count'], False) for requirement in value])
+
+def expand_field(field, value):
+    if (type(value) is not tuple):
+        return value
+
+    if (field == 'taskRequirements'):
+        return [{'task': {'id': prereq}} for prereq in value]
+
+    if (field == 'neededKeys'):
+        return [{'keys': [{'id': key} for key in _key_]} for _key_ in value]
+
+    if (field == 'itemRequirements'):
+        return [{'id': requirement.id, 'count': requirement.count, 'attributes': [{'type': _type_, 'value': _value_} for _type_, _value_ in requirement.attributes], 'item': {'id': requirement.item}} for requirement in value]
+
+    if (field == 'stationLevelRequirements'):
+        return [{'station': {'id': prereq.rpartition('-')[0]}, 'level': int(prereq.rpartition('-')[2])} for prereq in value]
+
+    return [{'item': {'id': requirement.item}, 'count': requirement.count} for requirement in value]
+
+def compact_entity(section, entity):
+    for field in COMPACT_FIELDS.get(section, []):
+        if (field in entity.keys()):
+            entity[field] = compact_field(field, entity[field])
+
+    return entity
+
+def compact_database(database):
+    for section in COMPACT_FIELDS.keys():
+        if (section in database.keys()):
+            for entity in database[section].values():
+                compact_entity(section, entity)
+
+    return database
+
+# A copy for writing out, leaving the database as it is
+def expand_entity(section, entity):
+    return entity | {field: expand_field(field, entity[field]) for field in COMPACT_FIELDS.get(section, []) if field in entity.keys()}
+
+def expand_database(database):
+    expanded = dict(database)
+
+    for section in COMPACT_FIELDS.keys():
+        if (section in database.keys()):
+            expanded[section] = {guid: expand_entity(section, entity) for guid, entity in database[section].items()}
+
+    return expanded
+
+# Items a task asks to be handed in
+def task_requirements(task):
+    for objective in task['objectives']:
+        if (objective['type'] == 'giveItem'):
+            yield Requirement(objective['item']['id'], objective['count'], objective['foundInRaid'])
+
+def task_keys(task):
+    if (task['neededKeys'] is None):
+        return []
+
+    return [key for _key_ in task['neededKeys'] for key in _key_]
+
+def entity_requirements(section, entity):
+    if (section == 'tasks'):
+        return task_requirements(entity)
+
+    if (section == 'hideout'):
+        return entity['itemRequirements']
+
+    return entity['requiredItems']
+
+# Task graph
+def build_task_graph(database):
+    print_debug('Building task graph')
+    tasks = database['tasks']
+    TASK_GRAPH['dependents'] = {guid: [] for guid in tasks.keys()}
+    TASK_GRAPH['unmet'] = {guid: 0 for guid in tasks.keys()}
+    TASK_GRAPH['complete'] = {guid for guid, task in database['tasks'].items() if task['status'] == 'complete'}
+    TASK_GRAPH['levels'] = sorted([(task['minPlayerLevel'], guid) for guid, task in tasks.items()])
+    TASK_GRAPH['level'] = database['player_level']
+    TASK_GRAPH['ordinals'] = {guid: ordinal for ordinal, guid in enumerate(tasks.keys())}
+
+    # Prerequisites missing from the database are never met
+    for guid, task in tasks.items():
+        for prereq_guid in task['taskRequirements']:
+            if (prereq_guid in TASK_GRAPH['dependents'].keys()):
+                TASK_GRAPH['dependents'][prereq_guid].append(guid)
+
+            if (prereq_guid not in TASK_GRAPH['complete']):
+                TASK_GRAPH['unmet'][guid] = TASK_GRAPH['unmet'][guid] + 1
+
+    TASK_GRAPH['database'] = database
+    TASK_GRAPH['available'] = {guid for guid in tasks.keys() if task_available(database, guid)}
+    return TASK_GRAPH['available']
+
+def task_available(database, guid):
+    task = database['tasks'][guid]
+    return task['status'] != 'complete' and task['tracked'] and database['player_level'] >= task['minPlayerLevel'] and TASK_GRAPH['unmet'][guid] == 0
+
+# Available tasks in database order
+def available_tasks(database):
+    if (TASK_GRAPH['database'] is not database):
+        build_task_graph(database)
+
+    return sorted(TASK_GRAPH['available'], key = TASK_GRAPH['ordinals'].get)
+
+# Only the changed tasks, their dependents and the tasks between the old and new player level are checked again
+def update_task_graph(database, changes):
+    if (TASK_GRAPH['database'] is not database):
+        return False
+
+    if (changes is None):
+        TASK_GRAPH['database'] = None
+        return True
+
+    affected = set()
+
+    for change in changes:
+        if (change == 'player_level'):
+            low, high = sorted([TASK_GRAPH['level'], database['player_level']])
+            levels = TASK_GRAPH['levels']
+            affected.update([guid for _level_, guid in levels[bisect_left(levels, (low + 1,)):bisect_left(levels, (high + 1,))]])
+            TASK_GRAPH['level'] = database['player_level']
+        elif (type(change) is tuple and change[0] == 'tasks'):
+            guid = change[1]
+
+            if (guid not in TASK_GRAPH['unmet'].keys()):
+                TASK_GRAPH['database'] = None
+                return True
+
+            complete = database['tasks'][guid]['status'] == 'complete'
+
+            if (complete != (guid in TASK_GRAPH['complete'])):
+                if (complete):
+                    TASK_GRAPH['complete'].add(guid)
+                else:
+                    TASK_GRAPH['complete'].discard(guid)
+
+                for dependent in TASK_GRAPH['dependents'][guid]:
+                    TASK_GRAPH['unmet'][dependent] = TASK_GRAPH['unmet'][dependent] + (-1 if complete else 1)
+                    affected.add(dependent)
+
+            affected.add(guid)
+
+    for guid in affected:
+        if (task_available(database, guid)):
+            TASK_GRAPH['available'].add(guid)
+        else:
+            TASK_GRAPH['available'].discard(guid)
+
+    return True
+
+def prefix_lookup(keys, prefix, matches):
+    position = bisect_left(keys, (prefix,))
+
+    while (position < len(keys) and keys[position][0].startswith(prefix)):
+        matches.add(keys[position][1])
+        position = position + 1
+
+    return matches
+
+# GUIDs starting with prefix, read off the sorted GUID array of the section
+def guid_lookup(database, section, prefix):
+    index = section_index(database, section)
+
+    if (prefix in index['order']):
+        return [prefix]
+
+    guids = index['guids']
+    position = bisect_left(guids, prefix)
+    matches = []
+
+    while (position < len(guids) and guids[position].startswith(prefix)):
+        matches.append(guids[position])
+        position = position + 1
+
+    return matches
+
+def is_guid_prefix(text):
+    return len(text) >= GUID_PREFIX_LENGTH and GUID_PREFIX.fullmatch(text) is not None
+
+# Same matches as string_compare against each field of the section, or a GUID or, unless prefixes is off, GUID prefix, in database order
+def lookup(database, section, text, prefixes = True):
+    index = section_index(database, section)
+    words = normalize(text).split(' ')
+    matches = set()
+
+    for field_index in index['fields'].values():
+        found = None
+
+        for word in words:
+            if (word not in field_index['tokens']):
+                found = set()
+                break
+
+            if (found is None):
+                found = set(field_index['tokens'][word])
+            else:
+                found = found & field_index['tokens'][word]
+
+        matches.update(found)
+        prefix_lookup(field_index['joined'], text.lower().replace('-', ''), matches)
+        prefix_lookup(field_index['spaced'], text.lower().replace('-', ' '), matches)
+
+    if (text in index['order']):
+        matches.add(text)
+    elif (prefixes and not matches and is_guid_prefix(text)):
+        matches.update(guid_lookup(database, section, text))
+
+    return sorted(matches, key = lambda guid: index['order'][guid])
+
+# Ranked matching on trigram similarity, for ambiguous and misspelt names
+def trigrams(normalized):
+    padded = f'  {normalized.strip()} '
+    return {padded[position:position + 3] for position in range(len(padded) - 2)}
+
+def jaccard(query, grams):
+    shared = len(query & grams)
+    return shared / (len(query) + len(grams) - shared)
+
+def similarity(query, guid):
+    for index in INDEX['sections'].values():
+        if (guid in index['order']):
+            return max([jaccard(query, grams) for field_index in index['fields'].values() for grams in field_index['grams'][guid]], default = 0)
+
+    return 0
+
+# Only names reached through the query's posting lists are scored, and a name sharing fewer than
+# FUZZY_THRESHOLD of the query's trigrams cannot reach the threshold so it is skipped unscored
+def fuzzy_lookup(database, sections, text):
+    query = trigrams(normalize(text))
+    scores = {}
+
+    for section in sections:
+        for field_index in section_index(database, section)['fields'].values():
+            shared = {}
+
+            for gram in query:
+                if (gram in field_index['trigrams']):
+                    for guid in field_index['trigrams'][gram]:
+                        shared[guid] = shared.get(guid, 0) + 1
+
+            for guid, count in shared.items():
+                if (count < FUZZY_THRESHOLD * len(query)):
+                    continue
+
+                score = max([jaccard(query, grams) for grams in field_index['grams'][guid]])
+
+                if (score >= FUZZY_THRESHOLD and score > scores.get(guid, 0)):
+                    scores[guid] = score
+
+    return sorted(scores.items(), key = lambda pair: pair[1], reverse = True)[:FUZZY_LIMIT]
+
+# A fuzzy guess, or the best of several names which matched, is only taken without asking when the command does not change anything
+def pick(text, ranked, entities, label, confirm = False, exact = False):
+    best_guid, best_score = ranked[0]
+
+    if (best_score >= FUZZY_THRESHOLD and (len(ranked) == 1 or best_score >= ranked[1][1] * FUZZY_DOMINANCE)):
+        if (not confirm):
+            print(f'Assuming {entities[best_guid]['normalizedName']} for {text}')
+            return best_guid
+
+        if (exact):
+            print_warning(f'Found {len(ranked)} {label} for {text}. Did you mean {entities[best_guid]['normalizedName']}? (Y/N)')
+        else:
+            print_warning(f'No exact match for {text}. Did you mean {entities[best_guid]['normalizedName']}? (Y/N)')
+
+        _confirmation_ = input('> ').lower()
+
+        if (_confirmation_ == 'y'):
+            return best_guid
+
+        print_debug(f'Declined >> {best_guid} << because >> {_confirmation_} <<')
+        return False
+
+    print_warning(f'Found {len(ranked)} {label} for {text}. Please choose one')
+    return disambiguate({guid: entities[guid] for guid, score in ranked})
+
+# Several names matched, offer them best first unless one clearly stands out. Commands which change the database confirm that one
+def choose(text, database, matches, label, confirm = False):
+    query = trigrams(normalize(text))
+    ranked = sorted([(guid, similarity(query, guid)) for guid in matches.keys()], key = lambda pair: pair[1], reverse = True)
+    return pick(text, ranked, matches, label, confirm, exact = True)
+
+# Nothing matched, fall back to the names closest to a possibly misspelt query. Commands which change the database confirm the guess
+def suggest(text, database, sections, label, confirm = False):
+    ranked = fuzzy_lookup(database, sections, text)
+
+    if (not ranked):
+        return False
+
+    print_debug(f'Closest matches >> {ranked} <<')
+    entities = {guid: database[section][guid] for section in sections for guid, score in ranked if guid in database[section]}
+    return pick(text, ranked, entities, label, confirm)
+
 def alphabetize_items(items):
     print_debug(f'Alphabetizing dict of size >> {len(items)} <<')
     return {guid: item for guid, item in sorted(items.items(), key = lambda item: item[1]['shortName'].lower())}
@@ -856,8 +2753,27 @@ def format_price(price, currency):
     else:
         return '₽{:,}'.format(price)
 
+def price_age(database):
+    if (type(database['refresh']) is not str):
+        return None
+
+    return datetime.now() - datetime.fromisoformat(database['refresh'])
+
+def format_age(age):
+    if (age is None):
+        return 'never'
+
+    if (age < timedelta(hours = 1)):
+        return f'{int(age.total_seconds() // 60)} minutes ago'
+    elif (age < timedelta(days = 1)):
+        return f'{int(age.total_seconds() // 3600)} hours ago'
+    else:
+        return f'{age.days} days ago'
+
 # Verify functions
-def verify_task(database, task):
+def verify_task(database, guid):
+    task = database['tasks'][guid]
+
     if (task['status'] == 'complete'):
         return f'Task {task["name"]} is complete'
     
@@ -867,28 +2783,23 @@ def verify_task(database, task):
     if (database['player_level'] < task['minPlayerLevel']):
         return f'Task {task["name"]} requires player level {task["minPlayerLevel"]} > current level {database["player_level"]}'
     
-    for prereq in task['taskRequirements']:
-        if ('id' in prereq):
-            id = prereq['id']
-        else:
-            id = prereq['task']['id']
-
-        if (database['tasks'][id]['status'] != 'complete'):
-            return f'{database['tasks'][id]['name']} must be completed first'
+    for prereq_guid in task['taskRequirements']:
+        if (database['tasks'][prereq_guid]['status'] != 'complete'):
+            return f'{database['tasks'][prereq_guid]['name']} must be completed first'
     
     print_debug(f'Verified task >> {task["name"]} <<')
     return True
 
-def verify_station(database, station):
+def verify_station(database, guid):
+    station = database['hideout'][guid]
+
     if (station['status'] == 'complete'):
         return f'Hideout station {station["normalizedName"]} is complete'
     
     if (not station['tracked']):
         return f'Hideout station {station["normalizedName"]} is not tracked'
 
-    for prereq in station['stationLevelRequirements']:
-        prereq_guid = prereq['station']['id'] + '-' + str(prereq['level'])
-
+    for prereq_guid in station['stationLevelRequirements']:
         if (database['hideout'][prereq_guid]['status'] != 'complete'):
             return f'{database['hideout'][prereq_guid]['normalizedName']} must be completed first'
         
@@ -1042,26 +2953,21 @@ def hideout_readiness(database, guid = False):
     for station_guid, station in database['hideout'].items():
         ready = False
         
-        if (type(verify_station(database, station)) is not str):
+        if (type(verify_station(database, station_guid)) is not str):
             for requirement in station['itemRequirements']:
-                this_guid = requirement['item']['id']
-                foundInRaid = False
-
-                for attribute in requirement['attributes']:
-                    if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
-                        foundInRaid = True
+                item = database['items'][requirement.item]
 
-                if (foundInRaid):
-                    if (database['items'][this_guid]['have_fir'] - database['items'][this_guid]['consumed_fir'] < requirement['count']):
+                if (requirement.fir):
+                    if (item['have_fir'] - item['consumed_fir'] < requirement.count):
                         ready = False
                         break
-                    elif (guid and requirement['item']['id'] == guid):
+                    elif (guid and requirement.item == guid):
                         ready = True
                 else:
-                    if (database['items'][this_guid]['have_nir'] - database['items'][this_guid]['consumed_nir'] < requirement['count']):
+                    if (item['have_nir'] - item['consumed_nir'] < requirement.count):
                         ready = False
                         break
-                    elif (guid and requirement['item']['id'] == guid):
+                    elif (guid and requirement.item == guid):
                         ready = True
             else:
                 if (ready or not guid):
@@ -1177,76 +3083,83 @@ def table_wrapper(rows, headers = None, padding = 3, max_chunks = 0):
 
 
 # Inventory functions
-def calculate_inventory(database):
-    for guid, task in database['tasks'].items():
-        if (not task['tracked']):
-            continue
+# Need by source
+def empty_sources():
+    return {section: {'need_fir': 0, 'need_nir': 0} for section in NEED_SOURCES}
 
-        for objective in task['objectives']:
-            if (objective['type'] == 'giveItem'):
-                item_guid = objective['item']['id']
-                fir = objective['foundInRaid']
+# Sources are replaced rather than changed in place so checkpoints taken before keep their values
+def add_need(database, section, item_guid, count, fir):
+    item = database['items'][item_guid]
 
-                if (fir):
-                    database['items'][item_guid]['need_fir'] = database['items'][item_guid]['need_fir'] + objective['count']
-                else:
-                    database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + objective['count']
-        
-        if (task['neededKeys'] is not None and len(task['neededKeys']) > 0):
-            for _key_ in task['neededKeys']:
-                for key in _key_['keys']:
-                    item_guid = key['id']
-                    database['items'][item_guid]['need_nir'] = 1
-    
-    print('Added all items required for tracked tasks to the database')
+    if (fir):
+        field = 'need_fir'
+    else:
+        field = 'need_nir'
 
-    for guid, station in database['hideout'].items():
-        if (not station['tracked']):
-            continue
+    sources = dict(item['need_sources'])
+    sources[section] = dict(sources[section])
+    sources[section][field] = sources[section][field] + count
+    item[field] = item[field] + count
+    item['need_sources'] = sources
+    return database
 
-        for requirement in station['itemRequirements']:
-            item_guid = requirement['item']['id']
-            foundInRaid = False
+# Databases saved before need was kept by source. Every restart of a tracked barter or craft added its requirements again
+def calculate_sources(database):
+    for item in database['items'].values():
+        item['need_sources'] = empty_sources()
 
-            for attribute in requirement['attributes']:
-                if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
-                    foundInRaid = True
+    for section in NEED_SOURCES:
+        for entity in database[section].values():
+            if (not entity['tracked']):
+                continue
 
-            if (foundInRaid):
-                database['items'][item_guid]['need_fir'] = database['items'][item_guid]['need_fir'] + requirement['count']
-            else:
-                database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + requirement['count']
+            repeats = 1 + entity.get('restarts', 0)
 
-    print('Added all items required for tracked hideout stations to the database')
+            for requirement in entity_requirements(section, entity):
+                sources = database['items'][requirement.item]['need_sources'][section]
 
-    for guid, barter in database['barters'].items():
-        if (not barter['tracked']):
-            continue
+                if (requirement.fir):
+                    sources['need_fir'] = sources['need_fir'] + requirement.count * repeats
+                else:
+                    sources['need_nir'] = sources['need_nir'] + requirement.count * repeats
 
-        for requirement in barter['requiredItems']:
-            item_guid = requirement['item']['id']
-            database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + requirement['count']
+    return database
 
-    print('Added all items required for tracked barters to the database')
+def calculate_inventory(database):
+    for item in database['items'].values():
+        item['need_sources'] = empty_sources()
 
-    for guid, craft in database['crafts'].items():
-        if (not craft['tracked']):
-            continue
+    for section, label in [('tasks', 'tasks'), ('hideout', 'hideout stations'), ('barters', 'barters'), ('crafts', 'crafts')]:
+        for entity in database[section].values():
+            if (not entity['tracked']):
+                continue
+
+            for requirement in entity_requirements(section, entity):
+                database = add_need(database, section, requirement.item, requirement.count, requirement.fir)
 
-        for requirement in craft['requiredItems']:
-            item_guid = requirement['item']['id']
-            database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + requirement['count']
+            if (section == 'tasks'):
+                for key in task_keys(entity):
+                    database['items'][key]['need_nir'] = 1
+
+        print(f'Added all items required for tracked {label} to the database')
 
-    print('Added all items required for tracked crafts to the database')
     return database
 
+# Read-only item with some fields shown differently, without copying or changing the item in the database
+def item_view(item, overlay = None):
+    if (overlay is None):
+        return MappingProxyType(item)
+
+    return MappingProxyType(ChainMap(overlay, item))
+
+# The six counters are fields of each item, where the commands, journal, overlay, snapshots and both storage backends read and write them
 def get_inventory(database):
     print_debug('Compiling inventory')
     items = {}
 
     for guid, item in database['items'].items():
         if (item['need_nir'] > 0 or item['need_fir'] > 0 or item['have_fir'] > 0 or item['have_nir'] > 0):
-            items[guid] = item
+            items[guid] = item_view(item)
 
     return items
 
@@ -1256,7 +3169,7 @@ def get_inventory_have(database):
 
     for guid, item in database['items'].items():
         if (item['have_fir'] > 0 or item['have_nir'] > 0):
-            items[guid] = item
+            items[guid] = item_view(item)
 
     return items
 
@@ -1266,100 +3179,49 @@ def get_inventory_need(database):
 
     for guid, item in database['items'].items():
         if (item['need_fir'] - item['have_fir'] > 0 or item['need_nir'] - item['have_nir'] > 0):
-            item['need_fir'] = item['need_fir'] - item['have_fir']
-            item['need_nir'] = item['need_nir'] - item['have_nir']
-            items[guid] = item
+            items[guid] = need_view(item)
 
     return items
 
-def get_inventory_tasks(database):
-    print_debug('Compiling inventory for tasks')
+def select_inventory_need(session, database):
+    print_debug('Selecting need inventory')
     items = {}
 
-    for guid, task in database['tasks'].items():
-        for objective in task['objectives']:
-            if (task['tracked']):
-                if (objective['type'] == 'giveItem'):
-                    item_guid = objective['item']['id']
-                    fir = objective['foundInRaid']
-
-                    if (item_guid not in items.keys()):
-                        items[item_guid] = database['items'][item_guid]
-                        items[item_guid]['need_fir'] = 0
-                        items[item_guid]['need_nir'] = 0
-
-                    if (fir):
-                        items[item_guid]['need_fir'] = items[item_guid]['need_fir'] + objective['count']
-                    else:
-                        items[item_guid]['need_nir'] = items[item_guid]['need_nir'] + objective['count']
+    for guid in select_sqlite(session, 'SELECT guid FROM items WHERE need_fir - have_fir > 0 OR need_nir - have_nir > 0 ORDER BY ordinal', ()):
+        items[guid] = need_view(database['items'][guid])
 
     return items
 
-def get_inventory_hideout(database):
-    print_debug('Compiling inventory for stations')
-    items = {}
-
-    for guid, station in database['hideout'].items():
-        if (not station['tracked']):
-            continue
-
-        for requirement in station['itemRequirements']:
-            item_guid = requirement['item']['id']
-            foundInRaid = False
-
-            if (item_guid not in items.keys()):
-                items[item_guid] = database['items'][item_guid]
-                items[item_guid]['need_fir'] = 0
-                items[item_guid]['need_nir'] = 0
-
-            for attribute in requirement['attributes']:
-                if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
-                    foundInRaid = True
+def need_view(item):
+    return item_view(item, {
+        'need_fir': item['need_fir'] - item['have_fir'],
+        'need_nir': item['need_nir'] - item['have_nir']
+    })
 
-            if (foundInRaid):
-                items[item_guid]['need_fir'] = items[item_guid]['need_fir'] + requirement['count']
-            else:
-                items[item_guid]['need_nir'] = items[item_guid]['need_nir'] + requirement['count']
+def get_inventory_tasks(database):
+    print_debug('Compiling inventory for tasks')
+    return get_inventory_source(database, 'tasks')
 
-    return items
+def get_inventory_hideout(database):
+    print_debug('Compiling inventory for stations')
+    return get_inventory_source(database, 'hideout')
 
 def get_inventory_barters(database):
     print_debug('Compiling inventory for barters')
-    items = {}
-
-    for guid, barter in database['barters'].items():
-        if (not barter['tracked']):
-            continue
-
-        for requirement in barter['requiredItems']:
-            item_guid = requirement['item']['id']
-
-            if (item_guid not in items.keys()):
-                items[item_guid] = database['items'][item_guid]
-                items[item_guid]['need_fir'] = 0
-                items[item_guid]['need_nir'] = 0
-
-            items[item_guid]['need_nir'] = items[item_guid]['need_nir'] + requirement['count']
-
-    return items
+    return get_inventory_source(database, 'barters')
 
 def get_inventory_crafts(database):
     print_debug('Compiling inventory for crafts')
-    items = {}
+    return get_inventory_source(database, 'crafts')
 
-    for guid, craft in database['crafts'].items():
-        if (not craft['tracked']):
-            continue
-
-        for requirement in craft['requiredItems']:
-            item_guid = requirement['item']['id']
+def get_inventory_source(database, section):
+    items = {}
 
-            if (item_guid not in items.keys()):
-                items[item_guid] = database['items'][item_guid]
-                items[item_guid]['need_fir'] = 0
-                items[item_guid]['need_nir'] = 0
+    for guid, item in database['items'].items():
+        need = item['need_sources'][section]
 
-            items[item_guid]['need_nir'] = items[item_guid]['need_nir'] + requirement['count']
+        if (need['need_fir'] > 0 or need['need_nir'] > 0):
+            items[guid] = item_view(item, need)
 
     return items
 
@@ -1368,10 +3230,9 @@ def get_tasks(database):
     print_debug('Compiling available tasks')
     tasks = {}
 
-    for guid, task in database['tasks'].items():
-        if (verify_task(database, task) == True):
-            print_debug(f'Found available task >> {task["name"]} <<')
-            tasks[guid] = task
+    for guid in available_tasks(database):
+        print_debug(f'Found available task >> {database['tasks'][guid]["name"]} <<')
+        tasks[guid] = database['tasks'][guid]
 
     return tasks
 
@@ -1380,9 +3241,8 @@ def get_tasks_filtered(database, argument):
     tasks = {}
     filter = create_filter(argument, database)
 
-    for guid, task in database['tasks'].items():
-        if (verify_task(database, task) != True):
-            continue
+    for guid in available_tasks(database):
+        task = database['tasks'][guid]
 
         if (not filter):
             return {}
@@ -1396,14 +3256,36 @@ def get_tasks_filtered(database, argument):
                 print_debug(f'Found task >> {task["name"]} << for trader >> {argument} <<')
                 tasks[guid] = task
 
-    return tasks
+    return tasks
+
+def select_tasks(session, database, argument):
+    print_debug(f'Selecting available tasks with filter >> {argument} <<')
+    query = SQLITE_AVAILABLE_TASKS
+    parameters = [database['player_level']]
+
+    if (argument != 'all'):
+        filter = create_filter(argument, database)
+
+        if (not filter):
+            return {}
+
+        if (filter == 'kappa'):
+            query = query + ' AND kappa'
+        elif (filter in database['maps'].keys()):
+            query = query + ' AND EXISTS (SELECT 1 FROM task_maps WHERE task = tasks.guid AND map IN (?, \'0\'))'
+            parameters.append(filter)
+        else:
+            query = query + ' AND trader = ?'
+            parameters.append(filter)
+
+    return {guid: database['tasks'][guid] for guid in select_sqlite(session, f'{query} ORDER BY ordinal', parameters)}
 
 def get_hideout(database):
     print_debug('Compiling available stations')
     stations = {}
 
     for guid, station in database['hideout'].items():
-        if (verify_station(database, station) == True):
+        if (verify_station(database, guid) == True):
             print_debug(f'Found available station >> {station["normalizedName"]} <<')
             stations[guid] = station
     
@@ -1488,7 +3370,7 @@ def get_saves(tracker_file, directory):
         saves.append('prev.null')
 
     for save in files:
-        if (tracker_file in save and save != tracker_file and save != f'{tracker_file}.curr.bak' and save != f'{tracker_file}.prev.bak'):
+        if (tracker_file in save and save.endswith('.bak') and save != f'{tracker_file}.curr.bak' and save != f'{tracker_file}.prev.bak'):
             print_debug(f'Found save >> {save} <<')
             saves.append(save)
     
@@ -1499,10 +3381,10 @@ def search_tasks(text, database):
     print_debug(f'Searching for tasks matching >> {text} <<')
     tasks = {}
 
-    for guid, task in database['tasks'].items():
-        if (string_compare(text, task['normalizedName']) or string_compare(text, task['name']) or guid == text):
-            print_debug(f'Found matching task >> {task['normalizedName']} <<')
-            tasks[guid] = task
+    for guid in lookup(database, 'tasks', text):
+        task = database['tasks'][guid]
+        print_debug(f'Found matching task >> {task['normalizedName']} <<')
+        tasks[guid] = task
 
     if (len(tasks) == 0):
         return False
@@ -1513,10 +3395,10 @@ def search_hideout(text, database):
     print_debug(f'Searching for hideout stations matching >> {text} <<')
     stations = {}
 
-    for guid, station in database['hideout'].items():
-        if (string_compare(text, station['normalizedName']) or guid == text):
-            print_debug(f'Found matching station >> {station['normalizedName']} <<')
-            stations[guid] = station
+    for guid in lookup(database, 'hideout', text):
+        station = database['hideout'][guid]
+        print_debug(f'Found matching station >> {station['normalizedName']} <<')
+        stations[guid] = station
 
     if (len(stations) == 0):
         return False
@@ -1527,10 +3409,9 @@ def search_barters(text, database):
     print_debug(f'Searching for barters matching >> {text} <<')
     barters = {}
 
-    for guid, barter in database['barters'].items():
-        if (guid == text):
-            print_debug(f'Found matching barter >> {guid} <<')
-            barters[guid] = barter
+    for guid in lookup(database, 'barters', text):
+        print_debug(f'Found matching barter >> {guid} <<')
+        barters[guid] = database['barters'][guid]
 
     if (len(barters) == 0):
         return False
@@ -1541,10 +3422,9 @@ def search_crafts(text, database):
     print_debug(f'Searching for crafts matching >> {text} <<')
     crafts = {}
 
-    for guid, craft in database['crafts'].items():
-        if (guid == text):
-            print_debug(f'Found matching craft >> {guid} <<')
-            crafts[guid] = craft
+    for guid in lookup(database, 'crafts', text):
+        print_debug(f'Found matching craft >> {guid} <<')
+        crafts[guid] = database['crafts'][guid]
 
     if (len(crafts) == 0):
         return False
@@ -1555,10 +3435,10 @@ def search_items(text, database):
     print_debug(f'Searching for items matching >> {text} <<')
     items = {}
 
-    for guid, item in database['items'].items():
-        if (string_compare(text, item['normalizedName']) or string_compare(text, item['shortName']) or guid == text):
-            print_debug(f'Found matching item >> {item['normalizedName']} <<')
-            items[guid] = item
+    for guid in lookup(database, 'items', text):
+        item = database['items'][guid]
+        print_debug(f'Found matching item >> {item['normalizedName']} <<')
+        items[guid] = item
 
     if (len(items) == 0):
         return False
@@ -1569,10 +3449,10 @@ def search_maps(text, database):
     print_debug(f'Searching for maps matching >> {text} <<')
     maps = {}
 
-    for guid, map in database['maps'].items():
-        if (string_compare(text, map['normalizedName']) or guid == text):
-            print_debug(f'Found matching map >> {map['normalizedName']} <<')
-            maps[guid] = map
+    for guid in lookup(database, 'maps', text):
+        map = database['maps'][guid]
+        print_debug(f'Found matching map >> {map['normalizedName']} <<')
+        maps[guid] = map
 
     if (len(maps) == 0):
         return False
@@ -1583,10 +3463,10 @@ def search_traders(text, database):
     print_debug(f'Searching for traders matching >> {text} <<')
     traders = {}
 
-    for guid, trader in database['traders'].items():
-        if (string_compare(text, trader['normalizedName']) or guid == text):
-            print_debug(f'Found matching trader >> {trader['normalizedName']} <<')
-            traders[guid] = trader
+    for guid in lookup(database, 'traders', text):
+        trader = database['traders'][guid]
+        print_debug(f'Found matching trader >> {trader['normalizedName']} <<')
+        traders[guid] = trader
 
     if (len(traders) == 0):
         return False
@@ -1594,98 +3474,105 @@ def search_traders(text, database):
     return traders
 
 def search_tasks_by_item(text, database):
-    tasks = {}
+    return search_by_item(text, database, 'tasks')
 
-    for guid, task in database['tasks'].items():
-        for objective in task['objectives']:
-            if (objective['type'] == 'giveItem'):
-                item_guid = objective['item']['id']
+def search_hideout_by_item(text, database):
+    return search_by_item(text, database, 'hideout')
 
-                if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                    tasks[guid] = task
-                    break
+def search_barters_by_item(text, database, required_only = False, tracked_only = False):
+    return search_by_item(text, database, 'barters', required_only, tracked_only)
 
-        if (task['neededKeys'] is not None):
-            for _key_ in task['neededKeys']:
-                for key in _key_['keys']:
-                    item_guid = key['id']
+def search_crafts_by_item(text, database, required_only = False, tracked_only = False):
+    return search_by_item(text, database, 'crafts', required_only, tracked_only)
 
-                    if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                        task[guid] = task
-                        break
-                else:
-                    continue
-                break
-    
-    if (len(tasks) == 0):
-        return False
+def search_by_item(text, database, section, required_only = False, tracked_only = False):
+    print_debug(f'Searching for {section} using items matching >> {text} <<')
+    guids = set()
 
-    return tasks
+    consumers = item_consumers(database)
 
-def search_hideout_by_item(text, database):
-    hideout = {}
+    for item_guid in lookup(database, 'items', text):
+        if (item_guid not in consumers.keys()):
+            continue
 
-    for guid, station in database['hideout'].items():
-        for requirement in station['itemRequirements']:
-            item_guid = requirement['item']['id']
+        for consumer in consumers[item_guid]:
+            if (consumer['section'] != section or (required_only and consumer['role'] != 'required')):
+                continue
 
-            if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                hideout[guid] = station
-    
-    if (len(hideout) == 0):
+            if (tracked_only and not database[section][consumer['guid']]['tracked']):
+                continue
+
+            guids.add(consumer['guid'])
+
+    if (len(guids) == 0):
         return False
 
-    return hideout
+    order = section_index(database, section)['order']
+    return {guid: database[section][guid] for guid in sorted(guids, key = lambda guid: order[guid])}
 
-def search_barters_by_item(text, database, required_only = False, tracked_only = False):
-    barters = {}
+def select_by_item(session, database, text, section, required_only = False, tracked_only = False):
+    print_debug(f'Selecting {section} using items matching >> {text} <<')
+    query = 'SELECT DISTINCT guid, ordinal FROM requirements WHERE section = ? AND item IN (SELECT value FROM json_each(?))'
 
-    for guid, barter in database['barters'].items():
-        if (tracked_only and not barter['tracked']):
-            continue
-        
-        for item_guid in barter['requiredItems']:
-            item_guid = item_guid['item']['id']
+    if (required_only):
+        query = query + ' AND role = \'required\''
 
-            if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                barters[guid] = barter
+    if (tracked_only):
+        query = query + f' AND guid IN (SELECT guid FROM {section} WHERE tracked)'
 
-        if (not required_only):
-            for item_guid in barter['rewardItems']:
-                item_guid = item_guid['item']['id']
+    guids = select_sqlite(session, f'{query} ORDER BY ordinal', (section, json.dumps(lookup(database, 'items', text))))
 
-                if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                    barters[guid] = barter
-    
-    if (len(barters) == 0):
+    if (len(guids) == 0):
         return False
-        
-    return barters
 
-def search_crafts_by_item(text, database, required_only = False, tracked_only = False):
-    crafts = {}
+    return {guid: database[section][guid] for guid in guids}
 
-    for guid, craft in database['crafts'].items():
-        if (tracked_only and not craft['tracked']):
-            continue
+# Search cache functions
+def search_key(kind, text, arguments):
+    return (kind, text, arguments, tuple([GENERATIONS[section] for section in SEARCH_PARTS[kind][1]]))
 
-        for item_guid in craft['requiredItems']:
-            item_guid = item_guid['item']['id']
+def search_part(database, kind, text, function, *arguments):
+    key = search_key(kind, text, arguments)
+    results = cached_search(database, key)
 
-            if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                crafts[guid] = craft
+    if (results):
+        return results[SEARCH_PARTS[kind][0]]
 
-        if (not required_only):
-            for item_guid in craft['rewardItems']:
-                item_guid = item_guid['item']['id']
+    found = function(text, database, *arguments)
+    cache_search(key, {SEARCH_PARTS[kind][0]: found})
+    return found
 
-                if (string_compare(text, database['items'][item_guid]['normalizedName']) or string_compare(text, database['items'][item_guid]['shortName']) or item_guid == text):
-                    crafts[guid] = craft
-    
-    if (len(crafts) == 0):
+def cached_search(database, key):
+    sections = frozenset(database.keys())
+
+    if (SEARCH_CACHE['database'] is not database or SEARCH_CACHE['sections'] != sections):
+        SEARCH_CACHE['database'] = database
+        SEARCH_CACHE['sections'] = sections
+        SEARCH_CACHE['results'].clear()
         return False
-        
-    return crafts
+
+    if (key not in SEARCH_CACHE['results'].keys()):
+        return False
+
+    print_debug(f'Reusing search results >> {key} <<')
+    SEARCH_CACHE['results'].move_to_end(key)
+    results = {}
+
+    for section, guids in SEARCH_CACHE['results'][key].items():
+        if (guids):
+            results[section] = {guid: database[section][guid] for guid in guids}
+        else:
+            results[section] = False
+
+    return results
+
+def cache_search(key, results):
+    SEARCH_CACHE['results'][key] = {section: found and list(found.keys()) for section, found in results.items()}
+
+    if (len(SEARCH_CACHE['results']) > SEARCH_CACHE_SIZE):
+        SEARCH_CACHE['results'].popitem(last = False)
+
+    return True
 
 # Track functions
 def track_task(database, guid):
@@ -1705,17 +3592,16 @@ def track_task(database, guid):
 
             if (objective['foundInRaid']):
                 print_debug('FIR')
-                database['items'][item_guid]['need_fir'] = database['items'][item_guid]['need_fir'] + count
+                database = add_need(database, 'tasks', item_guid, count, True)
                 print(f'{count} more {item_name} (FIR) now needed')
             else:
                 print_debug('NIR')
-                database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+                database = add_need(database, 'tasks', item_guid, count, False)
                 print(f'{count} more {item_name} (NIR) now needed')
 
     if (task['neededKeys'] is not None and len(task['neededKeys']) > 0):
         for _key_ in task['neededKeys']:
-            for key in _key_['keys']:
-                item_guid = key['id']
+            for item_guid in _key_:
                 database['items'][item_guid]['need_nir'] = 1
 
     database['tasks'][guid]['tracked'] = True
@@ -1731,12 +3617,17 @@ def track_station(database, guid):
         return database
     
     for requirement in station['itemRequirements']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement >> {requirement["id"]} <<')
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
-        print(f'{count} more {item_name} (NIR) now needed')
+        count = requirement.count
+        print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement >> {requirement.id} <<')
+
+        if (requirement.fir):
+            database = add_need(database, 'hideout', item_guid, count, True)
+            print(f'{count} more {item_name} (FIR) now needed')
+        else:
+            database = add_need(database, 'hideout', item_guid, count, False)
+            print(f'{count} more {item_name} (NIR) now needed')
 
     database['hideout'][guid]['tracked'] = True
     print(f'Tracked {station["normalizedName"]}')
@@ -1751,10 +3642,10 @@ def track_barter(database, guid):
         return database
     
     for requirement in barter['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+        count = requirement.count
+        database = add_need(database, 'barters', item_guid, count, False)
         print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement')
         print(f'{count} more {item_name} (NIR) now needed')
 
@@ -1771,10 +3662,10 @@ def track_craft(database, guid):
         return database
     
     for requirement in craft['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+        count = requirement.count
+        database = add_need(database, 'crafts', item_guid, count, False)
         print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement')
         print(f'{count} more {item_name} (NIR) now needed')
 
@@ -1799,11 +3690,11 @@ def untrack_task(database, guid):
 
             if (objective['foundInRaid']):
                 print_debug('FIR')
-                database['items'][item_guid]['need_fir'] = database['items'][item_guid]['need_fir'] - count
+                database = add_need(database, 'tasks', item_guid, -count, True)
                 print(f'{count} less {item_name} (FIR) now needed')
             else:
                 print_debug('NIR')
-                database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] - count
+                database = add_need(database, 'tasks', item_guid, -count, False)
                 print(f'{count} less {item_name} (NIR) now needed')
 
     database['tasks'][guid]['tracked'] = False
@@ -1819,12 +3710,17 @@ def untrack_station(database, guid):
         return database
     
     for requirement in station['itemRequirements']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        print_debug(f'Removing >> {count} << of >> {item_guid} << for requirement >> {requirement["id"]} <<')
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] - count
-        print(f'{count} less {item_name} (NIR) now needed')
+        count = requirement.count
+        print_debug(f'Removing >> {count} << of >> {item_guid} << for requirement >> {requirement.id} <<')
+
+        if (requirement.fir):
+            database = add_need(database, 'hideout', item_guid, -count, True)
+            print(f'{count} less {item_name} (FIR) now needed')
+        else:
+            database = add_need(database, 'hideout', item_guid, -count, False)
+            print(f'{count} less {item_name} (NIR) now needed')
 
     database['hideout'][guid]['tracked'] = False
     print(f'Untracked {station["normalizedName"]}')
@@ -1835,14 +3731,14 @@ def untrack_barter(database, guid):
     barter = database['barters'][guid]
 
     if (not barter['tracked']):
-        print(f'{barter["id"]} is already untracked')
+        print(f'{guid} is already untracked')
         return database
     
     for requirement in barter['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+        count = requirement.count
+        database = add_need(database, 'barters', item_guid, -count, False)
         print_debug(f'Removing >> {count} << of >> {item_guid} << for requirement')
         print(f'{count} less {item_name} (NIR) now needed')
 
@@ -1855,14 +3751,14 @@ def untrack_craft(database, guid):
     craft = database['crafts'][guid]
 
     if (not craft['tracked']):
-        print(f'{craft["id"]} is already untracked')
+        print(f'{guid} is already untracked')
         return database
     
     for requirement in craft['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        count = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+        count = requirement.count
+        database = add_need(database, 'crafts', item_guid, -count, False)
         print_debug(f'Removing >> {count} << of >> {item_guid} << for requirement')
         print(f'{count} less {item_name} (NIR) now needed')
 
@@ -1882,7 +3778,7 @@ def complete_task(database, guid, force):
         print_error(f'{task["name"]} is not tracked')
         return False
 
-    _return_ = verify_task(database, task)
+    _return_ = verify_task(database, guid)
                             
     if (type(_return_) is str and not force):
         print_error(_return_)
@@ -1950,7 +3846,7 @@ def complete_recursive_task(database, guid, tasks = []):
         tasks.append(guid)
 
     for prereq in database['tasks'][guid]['taskRequirements']:
-        tasks = complete_recursive_task(database, prereq['task']['id'], tasks = tasks)
+        tasks = complete_recursive_task(database, prereq, tasks = tasks)
         tasks.append(guid)
     
     return tasks
@@ -1966,23 +3862,19 @@ def complete_station(database, guid, force):
         print_error(f'{station["normalizedName"]} is not tracked')
         return False
 
-    _return_ = verify_station(database, station)
+    _return_ = verify_station(database, guid)
 
     if (type(_return_) is str and not force):
         print_error(_return_)
         return False
 
     for requirement in station['itemRequirements']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
         available_fir = database['items'][item_guid]['have_fir'] - database['items'][item_guid]['consumed_fir']
         available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
-        need = requirement['count']
-        foundInRaid = False
-
-        for attribute in requirement['attributes']:
-            if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
-                foundInRaid = True
+        need = requirement.count
+        foundInRaid = requirement.fir
 
         if (foundInRaid):
             _remainder_ = need - available_fir
@@ -2053,11 +3945,11 @@ def complete_barter(database, guid, force):
         return False
 
     for requirement in barter['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
         available_fir = database['items'][item_guid]['have_fir'] - database['items'][item_guid]['consumed_fir']
         available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
-        need_nir = requirement['count']
+        need_nir = requirement.count
         _remainder_ = need_nir - available_nir
 
         if (_remainder_ > 0):
@@ -2109,11 +4001,11 @@ def complete_craft(database, guid, force):
         return False
 
     for requirement in craft['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
         available_fir = database['items'][item_guid]['have_fir'] - database['items'][item_guid]['consumed_fir']
         available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
-        need_nir = requirement['count']
+        need_nir = requirement.count
         _remainder_ = need_nir - available_nir
 
         if (_remainder_ > 0):
@@ -2160,10 +4052,10 @@ def restart_barter(database, guid):
         return False
 
     for requirement in barter['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        need_nir = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + need_nir
+        need_nir = requirement.count
+        database = add_need(database, 'barters', item_guid, need_nir, False)
         print_debug(f'Adding >> {need_nir} << of >> {item_guid} << for requirement')
         print(f'{need_nir} more {item_name} (NIR) now needed')
     
@@ -2184,10 +4076,10 @@ def restart_craft(database, guid):
         return False
 
     for requirement in craft['requiredItems']:
-        item_guid = requirement['item']['id']
+        item_guid = requirement.item
         item_name = database['items'][item_guid]['shortName']
-        need_nir = requirement['count']
-        database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + need_nir
+        need_nir = requirement.count
+        database = add_need(database, 'crafts', item_guid, need_nir, False)
         print_debug(f'Adding >> {need_nir} << of >> {item_guid} << for requirement')
         print(f'{need_nir} more {item_name} (NIR) now needed')
     
@@ -2197,175 +4089,310 @@ def restart_craft(database, guid):
     return database
 
 # Import functions
-def import_tasks(database, headers):
-    data = {
-        'query': """
-            {
-                tasks {
-                    id
-                    name
-                    normalizedName
-                    trader {
-                        id
-                    }
-                    map {
-                        id
-                    }
-                    minPlayerLevel
-                    taskRequirements {
-                        task {
-                            id
-                        }
-                    }
-                    traderRequirements {
-                        id
-                        requirementType
-                        trader {
-                            id
-                        }
-                    }
-                    objectives {
-                        id
-                        type
-                        description
-                        optional
-                        maps {
-                            id
-                        }
-                        ... on TaskObjectiveExtract {
-                            maps {
-                                id
-                            }
-                            exitStatus
-                            exitName
-                            zoneNames
-                        }
-                        ... on TaskObjectiveItem {
-                            id
-                            count
-                            foundInRaid
-                            item {
-                                id
-                            }
-                        }
-                        ... on TaskObjectivePlayerLevel {
-                            playerLevel
-                        }
-                        ... on TaskObjectiveQuestItem {
-                            questItem {
-                                id
-                            }
-                            count
-                        }
-                        ... on TaskObjectiveShoot {
-                            targetNames
-                            count
-                            shotType
-                            zoneNames
-                            bodyParts
-                            usingWeapon {
-                                id
-                            }
-                            usingWeaponMods {
-                                id
-                            }
-                            wearing {
-                                id
-                            }
-                            notWearing {
-                                id
-                            }
-                            distance {
-                                value
-                            }
-                            playerHealthEffect {
-                                bodyParts
-                                effects
-                                time {
-                                    value
-                                }
-                            }
-                            enemyHealthEffect {
-                                bodyParts
-                                effects
-                                time {
-                                    value
-                                }
-                            }
-                            timeFromHour
-                            timeUntilHour
-                        }
-                        ... on TaskObjectiveSkill {
-                            skillLevel {
-                                name
-                                level
-                            }
-                        }
-                        ... on TaskObjectiveTaskStatus {
-                            task {
-                                id
-                            }
-                            status
-                        }
-                        ... on TaskObjectiveTraderLevel {
-                            trader {
-                                id
-                            }
-                            level
-                        }
-                        ... on TaskObjectiveTraderStanding {
-                            trader {
-                                id
-                            }
-                            value
-                        }
-                        ... on TaskObjectiveUseItem {
-                            useAny {
-                                id
-                            }
-                            count
-                            zoneNames
-                        }
-                    }
-                    neededKeys {
-                        keys {
-                            id
-                        }
-                    }
-                    kappaRequired
-                    lightkeeperRequired
-                }
-            }
-        """
+def query_api(names, headers):
+    query = '{' + ''.join([QUERIES[name] for name in names]) + '}'
+    start = time.time()
+
+    try:
+        response = HTTP.post(url = API_URL, headers = headers, json = {'query': query}, timeout = HTTP_TIMEOUT)
+    except:
+        print_error(f'Encountered error retrieving {', '.join(names)} data')
+        return False
+    finally:
+        FETCH_TIMES[', '.join(names)] = time.time() - start
+
+    if (response.status_code < 200 or response.status_code > 299):
+        print_error(f'Network error [{response.status_code}] {response.content}')
+        return False
+
+    result = response.json()
+
+    if (not check_errors(result)):
+        return False
+
+    return result['data']
+
+def check_errors(result):
+    if ('errors' in result.keys()):
+        # A missing flea market fee only blanks that field, anything else fails the query
+        for error in result['errors']:
+            if ('path' not in error.keys() or 'fleaMarketFee' not in error['path']):
+                print_error(f'Errors detected {json.dumps(result)}')
+                return False
+
+        print_warning(f'Errors detected {json.dumps(result["errors"])}')
+
+    return True
+
+# Yields each element of the "items" array while the response downloads. Everything else in the body is parsed into envelope once the stream ends
+def iterate_items(response, envelope):
+    decoder = json.JSONDecoder()
+    chunks = response.iter_content(chunk_size = 65536, decode_unicode = True)
+    buffer = ''
+    prefix = None
+    pos = 0
+
+    for chunk in chunks:
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+        if (prefix is None):
+            marker = ITEMS_MARKER.search(buffer)
+
+            if (not marker):
+                continue
+
+            prefix = buffer[:marker.end()]
+            pos = marker.end()
+
+        while (True):
+            while (pos < len(buffer) and buffer[pos] in ' \t\r\n,'):
+                pos = pos + 1
+
+            if (pos == len(buffer) or buffer[pos] == ']'):
+                break
+
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break
+
+            yield item
+
+        if (pos < len(buffer) and buffer[pos] == ']'):
+            break
+
+    suffix = buffer[pos:] + ''.join(chunks)
+
+    if (prefix is None):
+        envelope.update(json.loads(suffix))
+    else:
+        envelope.update(json.loads(prefix + suffix))
+
+    return
+
+def stream_items(database, headers):
+    start = time.time()
+    rates = {
+        'usd': 0,
+        'euro': 0
     }
+    deferred = []
+    envelope = {}
+
+    try:
+        with HTTP.post(url = API_URL, headers = headers, json = {'query': '{' + QUERIES['items'] + '}'}, timeout = HTTP_TIMEOUT, stream = True) as response:
+            if (response.status_code < 200 or response.status_code > 299):
+                print_error(f'Network error [{response.status_code}] {response.content}')
+                return False
+
+            response.encoding = 'utf-8'
+
+            # Prices in dollars or euros wait until both exchange rate items have arrived
+            for item in iterate_items(response, envelope):
+                exchange_rates(item, rates)
+
+                if ((rates['usd'] and rates['euro']) or not foreign_prices(item)):
+                    process_item(database, item, rates)
+                else:
+                    deferred.append(item)
+    except:
+        print_error('Encountered error retrieving items data')
+        return False
+    finally:
+        FETCH_TIMES['items'] = time.time() - start
 
+    if (not check_errors(envelope)):
+        return False
+
+    for item in deferred:
+        process_item(database, item, rates)
+
+    print_debug(f'Streamed items in >> {FETCH_TIMES['items']:.2f}s << with >> {len(deferred)} << deferred')
+    database['refresh'] = datetime.now().isoformat()
+    return database
+
+def fetch_data(names, headers, batch = False, stream = None):
     stop = threading.Event()
     progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
     progress_bar_thread.start()
+    data = {}
+
+    # Batching sends every root field in one document, otherwise each gets its own request
+    if (batch):
+        groups = [names]
+    else:
+        groups = [[name] for name in names]
 
     try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
+        with ThreadPoolExecutor(max_workers = len(groups) + 1) as executor:
+            futures = [executor.submit(query_api, group, headers) for group in groups]
+
+            # Items can be streamed straight into a database alongside the other queries
+            if (stream is not None):
+                streamed = executor.submit(stream_items, stream, headers)
+
+            results = [future.result() for future in futures]
+    finally:
+        stop.set()
+        progress_bar_thread.join()
+
+    if (stream is not None and not streamed.result()):
         return False
+
+    for group, result in zip(groups, results):
+        if (not result):
+            return False
+
+        print_debug(f'Retrieved >> {group} << in >> {FETCH_TIMES[', '.join(group)]:.2f}s <<')
+        data.update(result)
+
+    print(f'Retrieved latest {', '.join(names)} data from the api.tarkov.dev server')
+    return data
+
+def import_items(database, headers):
+    stop = threading.Event()
+    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
+    progress_bar_thread.start()
+
+    try:
+        database = stream_items(database, headers)
     finally:
         stop.set()
         progress_bar_thread.join()
 
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
+    if (not database):
         return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_error(f'Errors detected {json.dumps(response.json())}')
+
+    # New items or renames are only picked up by a fresh index
+    invalidate_index()
+
+    print('Retrieved latest item data from the api.tarkov.dev server')
+    print(f'Successfully loaded item data into the database!')
+    return database
+
+# Reprices an item into staged rather than the database, keeping only prices which differ from the current ones
+def stage_prices(database, item, rates, staged):
+    guid = item['id']
+
+    if (guid not in database['items'].keys()):
+        return False
+
+    scratch = {'items': {guid: {}}}
+    process_item(scratch, item, rates)
+    prices = scratch['items'][guid]
+
+    for field in PRICE_FIELDS:
+        if (database['items'][guid].get(field) != prices.get(field)):
+            staged[guid] = {field: prices[field] for field in PRICE_FIELDS if field in prices}
+            return True
+
+    return False
+
+def refresh_prices(session):
+    database = session['database']
+    headers = {
+        'Content-Type': 'application/json'
+    }
+    rates = {
+        'usd': 0,
+        'euro': 0
+    }
+    deferred = []
+    envelope = {}
+    staged = {}
+
+    if ('price_validators' in database.keys()):
+        for header, value in database['price_validators'].items():
+            headers[VALIDATORS[header]] = value
+
+    try:
+        with HTTP.post(url = API_URL, headers = headers, json = {'query': '{' + PRICES_QUERY + '}'}, timeout = HTTP_TIMEOUT, stream = True) as response:
+            if (response.status_code == 304):
+                print_debug('Prices not modified since the last refresh')
+            elif (response.status_code < 200 or response.status_code > 299):
+                print_error(f'Network error [{response.status_code}] {response.content}')
+                return False
+            else:
+                validators = {header: response.headers[header] for header in VALIDATORS.keys() if header in response.headers}
+                response.encoding = 'utf-8'
+
+                for item in iterate_items(response, envelope):
+                    exchange_rates(item, rates)
+
+                    if ((rates['usd'] and rates['euro']) or not foreign_prices(item)):
+                        stage_prices(database, item, rates, staged)
+                    else:
+                        deferred.append(item)
+    except:
+        print_error('Encountered error refreshing item prices')
+        return False
+
+    if (envelope and not check_errors(envelope)):
+        return False
+
+    for item in deferred:
+        stage_prices(database, item, rates, staged)
+
+    # New prices are swapped in all at once, never while a command is running
+    with session['lock']:
+        if (session['database'] is not database):
+            print_debug('Database was replaced during the price refresh')
             return False
-        
-        print('Retrieved latest task data from the api.tarkov.dev server')
 
+        for guid, prices in staged.items():
+            database['items'][guid].update(prices)
+
+        database['refresh'] = datetime.now().isoformat()
+        changes = [('items', guid, PRICE_FIELDS) for guid in staged.keys()] + ['refresh']
+
+        if (envelope):
+            database['price_validators'] = validators
+            changes.append('price_validators')
+
+        save_database(session, database, changes = changes)
+
+    print_debug(f'Refreshed prices of >> {len(staged)} << items')
+    return True
+
+def price_refresher(session):
+    interval = PRICE_CHECK_INTERVAL
+
+    while (not session['stop'].wait(interval)):
+        interval = PRICE_CHECK_INTERVAL
+        database = session['database']
+
+        # Nothing to refresh until a command has loaded the whole database
+        if (not database or session['pending']):
+            continue
+
+        age = price_age(database)
+
+        if (age is not None and age < timedelta(hours = PRICE_REFRESH_HOURS)):
+            continue
+
+        print_debug('Refreshing item prices in the background')
+
+        if (not refresh_prices(session)):
+            interval = PRICE_RETRY_INTERVAL
+
+    return True
+
+def start_refresher(session):
+    session['refresher'] = threading.Thread(target = price_refresher, args = (session,), daemon = True)
+    session['refresher'].start()
+    return True
+
+def process_tasks(database, tasks):
     nonKappa = 0
     imported_tasks = 0
+    follow_on = {}
+
+    # Counted up front as the loop below strips the ids recurse_priority walks
+    for task in tasks:
+        follow_on[task['id']] = recurse_priority(tasks, task['id'])
 
-    for task in response.json()['data']['tasks']:
+    for task in tasks:
         guid = task['id']
         del task['id']
         task['maps'] = []
@@ -2389,7 +4416,7 @@ def import_tasks(database, headers):
         else:
             priority = 0
 
-        follow_on_tasks = recurse_priority(response.json()['data']['tasks'], guid)
+        follow_on_tasks = follow_on[guid]
 
         if (follow_on_tasks == 0):
             priority = priority
@@ -2398,72 +4425,16 @@ def import_tasks(database, headers):
         elif (2 < follow_on_tasks < 8):
             priority += 2
         else:
-            priority += 3
-
-        task['priority'] = priority
-        imported_tasks = imported_tasks + 1
-        database['tasks'][guid] = task
-
-    print(f'Successfully loaded {imported_tasks} tasks into the database! {nonKappa} non-Kappa required tasks have been automatically untracked')
-    return database
-
-def import_hideout(database, headers):
-    data = {
-        'query': """
-            {
-                hideoutStations {
-                    id
-                    normalizedName
-                    levels {
-                        id
-                        level
-                        itemRequirements {
-                            id
-                            count
-                            attributes {
-                                type
-                                value
-                            }
-                            item {
-                                id
-                            }
-                        }
-                        stationLevelRequirements {
-                            station {
-                                id
-                            }
-                            level
-                        }
-                    }
-                }
-            }
-        """
-    }
-
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
+            priority += 3
 
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
+        task['priority'] = priority
+        imported_tasks = imported_tasks + 1
+        database['tasks'][guid] = add_search_forms(compact_entity('tasks', task), 'tasks')
 
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_error(f'Errors detected {json.dumps(response.json())}')
-            return False
-        
-        print('Retrieved latest hideout data from the api.tarkov.dev server')
-        hideout = response.json()['data']['hideoutStations']
+    print(f'Successfully loaded {imported_tasks} tasks into the database! {nonKappa} non-Kappa required tasks have been automatically untracked')
+    return database
 
+def process_hideout(database, hideout):
     for station in hideout:
         for level in station['levels']:
             guid = level['id']
@@ -2476,391 +4447,210 @@ def import_hideout(database, headers):
                 level['status'] = 'complete'
                 print('Completed stash-1 automatically')
 
-            database['hideout'][guid] = level
+            database['hideout'][guid] = add_search_forms(compact_entity('hideout', level), 'hideout')
 
     print(f'Successfully loaded hideout data into the database!')
     return database
 
-def import_barters(database, headers):
-    data = {
-        'query': """
-            {
-                barters {
-                    id
-                    trader {
-                    id
-                    }
-                    level
-                    taskUnlock {
-                    id
-                    }
-                    requiredItems {
-                    item {
-                        id
-                    }
-                    count
-                    }
-                    rewardItems {
-                    item {
-                        id
-                    }
-                    count
-                    }
-                }
-            }
-        """
-    }
-
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
-
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
-    
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-                print_error(f'Errors detected {json.dumps(response.json())}')
-                return False
-
-        print('Retrieved latest barter data from the api.tarkov.dev server')
-        barters = response.json()['data']['barters']
-
+def process_barters(database, barters):
     for barter in barters:
         guid = barter['id']
         del barter['id']
         barter['status'] = 'incomplete'
         barter['tracked'] = False
         barter['restarts'] = 0
-        database['barters'][guid] = barter
+        database['barters'][guid] = compact_entity('barters', barter)
 
     print(f'Successfully loaded barter data into the database!')
     return database
 
-def import_crafts(database, headers):
-    data = {
-        'query': """
-            {
-                crafts {
-                    id
-                    duration
-                    station {
-                    id
-                    }
-                    level
-                    taskUnlock {
-                    id
-                    }
-                    requiredItems {
-                    item {
-                        id
-                    }
-                    count
-                    }
-                    rewardItems {
-                    item {
-                        id
-                    }
-                    count
-                    }
-                }
-            }
-        """
-    }
-    
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
-
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
-
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_error(f'Errors detected {json.dumps(response.json())}')
-            return False
-
-        print('Retrieved latest craft data from the api.tarkov.dev server')
-        crafts = response.json()['data']['crafts']
-
+def process_crafts(database, crafts):
     for craft in crafts:
         guid = craft['id']
         del craft['id']
         craft['status'] = 'incomplete'
         craft['tracked'] = False
         craft['restarts'] = 0
-        database['crafts'][guid] = craft
+        database['crafts'][guid] = compact_entity('crafts', craft)
     
     print(f'Successfully loaded craft data into the database!')
     return database
 
-def import_items(database, headers):
-    data = {
-        'query': """
-            {
-                items {
-                    id
-                    normalizedName
-                    shortName
-                    sellFor {
-                        vendor {
-                            normalizedName
-                            ... on FleaMarket {
-                                minPlayerLevel
-                            }
-                        }
-                        price
-                        currency
-                    }
-                    buyFor {
-                        vendor {
-                            normalizedName
-                            ... on TraderOffer {
-                                minTraderLevel
-                                taskUnlock {
-                                    normalizedName
-                                }
-                            }
-                        }
-                        price
-                        currency
-                    }
-                    avg24hPrice
-                    fleaMarketFee
-                }
-            }
-        """
+def process_items(database, items):
+    rates = {
+        'usd': 0,
+        'euro': 0
     }
 
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
-
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
+    for item in items:
+        exchange_rates(item, rates)
 
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_warning(f'Errors detected {json.dumps(response.json()["errors"])}')
-            
-            for error in response.json()['errors']:
-                if ('fleaMarketFee' not in error['path']):
-                    return False
+    for item in items:
+        process_item(database, item, rates)
 
-        items = response.json()['data']['items']
+    database['refresh'] = datetime.now().isoformat()
+    print(f'Successfully loaded item data into the database!')
+    return database
 
-    usd_to_roubles = 0
-    euro_to_roubles = 0
+def exchange_rates(item, rates):
+    if (item['id'] == '5696686a4bdc2da3298b456a'):
+        for vendor in item['buyFor']:
+            if (vendor['vendor']['normalizedName'] == 'peacekeeper'):
+                rates['usd'] = int(vendor['price'])
 
-    for item in items:
-        if (item['id'] == '5696686a4bdc2da3298b456a'):
-            for vendor in item['buyFor']:
-                if (vendor['vendor']['normalizedName'] == 'peacekeeper'):
-                    usd_to_roubles = int(vendor['price'])
+    if (item['id'] == '569668774bdc2da2298b4568'):
+        for vendor in item['buyFor']:
+            if (vendor['vendor']['normalizedName'] == 'skier'):
+                rates['euro'] = int(vendor['price'])
 
-        if (item['id'] == '569668774bdc2da2298b4568'):
-            for vendor in item['buyFor']:
-                if (vendor['vendor']['normalizedName'] == 'skier'):
-                    euro_to_roubles = int(vendor['price'])
+    return rates
 
-    for item in items:
-        guid = item['id']
+def foreign_prices(item):
+    for vendor in item['sellFor'] + item['buyFor']:
+        if (vendor['currency'].lower() in ['usd', 'euro']):
+            return True
 
-        # Flea vars
-        if ('avg24hPrice' in item.keys() and item['avg24hPrice'] is not None):
-            flea_price = item['avg24hPrice']
-            flea_currency = 'RUB'
-        else:
-            flea_price = 0
-            flea_currency = 'N/A'
-
-        # Selling vars
-        best_trader_sell = 'N/A'
-        best_trader_sell_price = 0
-        best_trader_sell_currency = 'N/A'
-        best_trader_sell_roubles = 0
-        flea_level = 0
-
-        # Buying vars
-        best_trader_buy = 'N/A'
-        best_trader_buy_price = 0
-        best_trader_buy_currency = 'N/A'
-        best_trader_buy_roubles = 0
-        best_trader_level = 0
-        best_trader_task_req = 'N/A'
-
-        # Sell logic
-
-        max_sell = 0
-
-        # Finds best trader to sell to
-        for vendor in item['sellFor']:
-            if ('flea' in vendor['vendor']['normalizedName']):
-                flea_level = vendor['vendor']['minPlayerLevel']
-                continue
+    return False
 
-            this_price = int(vendor['price'])
-            this_currency = vendor['currency']
-            this_price_converted = 0
+def process_item(database, item, rates):
+    usd_to_roubles = rates['usd']
+    euro_to_roubles = rates['euro']
+    guid = item['id']
 
-            # Normalizes all prices to roubles
-            if (this_currency.lower() == 'usd'):
-                this_price_converted = this_price * usd_to_roubles
-            elif (this_currency.lower() == 'euro'):
-                this_price_converted = this_price * euro_to_roubles
-            else:
-                this_price_converted = this_price
+    # Flea vars
+    if ('avg24hPrice' in item.keys() and item['avg24hPrice'] is not None):
+        flea_price = item['avg24hPrice']
+        flea_currency = 'RUB'
+    else:
+        flea_price = 0
+        flea_currency = 'N/A'
+
+    # Selling vars
+    best_trader_sell = 'N/A'
+    best_trader_sell_price = 0
+    best_trader_sell_currency = 'N/A'
+    best_trader_sell_roubles = 0
+    flea_level = 0
+
+    # Buying vars
+    best_trader_buy = 'N/A'
+    best_trader_buy_price = 0
+    best_trader_buy_currency = 'N/A'
+    best_trader_buy_roubles = 0
+    best_trader_level = 0
+    best_trader_task_req = 'N/A'
+
+    # Sell logic
+
+    max_sell = 0
+
+    # Finds best trader to sell to
+    for vendor in item['sellFor']:
+        if ('flea' in vendor['vendor']['normalizedName']):
+            flea_level = vendor['vendor']['minPlayerLevel']
+            continue
 
-            # Sets best trader sell
-            if (this_price_converted > max_sell):
-                best_trader_sell_price = this_price
-                best_trader_sell = vendor['vendor']['normalizedName']
-                best_trader_sell_currency = this_currency
-                max_sell = this_price_converted
+        this_price = int(vendor['price'])
+        this_currency = vendor['currency']
+        this_price_converted = 0
 
-                if (best_trader_sell_currency.lower() in ['usd', 'euro']):
-                    best_trader_sell_roubles = this_price_converted
-                else:
-                    best_trader_sell_roubles = 0
+        # Normalizes all prices to roubles
+        if (this_currency.lower() == 'usd'):
+            this_price_converted = this_price * usd_to_roubles
+        elif (this_currency.lower() == 'euro'):
+            this_price_converted = this_price * euro_to_roubles
+        else:
+            this_price_converted = this_price
 
-        # Buy logic
+        # Sets best trader sell
+        if (this_price_converted > max_sell):
+            best_trader_sell_price = this_price
+            best_trader_sell = vendor['vendor']['normalizedName']
+            best_trader_sell_currency = this_currency
+            max_sell = this_price_converted
 
-        min_buy = sys.maxsize
+            if (best_trader_sell_currency.lower() in ['usd', 'euro']):
+                best_trader_sell_roubles = this_price_converted
+            else:
+                best_trader_sell_roubles = 0
 
-        # Finds best trader to buy from
-        for vendor in item['buyFor']:
-            if ('flea' in vendor['vendor']['normalizedName']):
-                continue
+    # Buy logic
 
-            this_price = int(vendor['price'])
-            this_currency = vendor['currency']
-            this_price_converted = 0
+    min_buy = sys.maxsize
 
-            # Normalizes all prices to roubles
-            if (this_currency.lower() == 'usd'):
-                this_price_converted = this_price * usd_to_roubles
-            elif (this_currency.lower() == 'euro'):
-                this_price_converted = this_price * euro_to_roubles
-            else:
-                this_price_converted = this_price
-
-            # Sets best trader buy
-            if (this_price_converted < min_buy):
-                best_trader_buy_price = this_price
-                best_trader_buy = vendor['vendor']['normalizedName']
-                best_trader_buy_currency = this_currency
-                best_trader_level = vendor['vendor']['minTraderLevel']
-                min_buy = this_price_converted
-
-                if (vendor['vendor']['taskUnlock']):
-                    best_trader_task_req = vendor['vendor']['taskUnlock']['normalizedName']
-                else:
-                    best_trader_task_req = 'N/A'
+    # Finds best trader to buy from
+    for vendor in item['buyFor']:
+        if ('flea' in vendor['vendor']['normalizedName']):
+            continue
 
-                if (best_trader_buy_currency.lower() in ['usd', 'euro']):
-                    best_trader_buy_roubles = this_price_converted
-                else:
-                    best_trader_buy_roubles = 0
+        this_price = int(vendor['price'])
+        this_currency = vendor['currency']
+        this_price_converted = 0
 
-        # Setting inventory values
-        if (guid not in database['items'].keys()):
-            database['items'][guid] = {
-                'need_fir': 0,
-                'need_nir': 0,
-                'have_fir': 0,
-                'have_nir': 0,
-                'consumed_fir': 0,
-                'consumed_nir': 0
-            }
+        # Normalizes all prices to roubles
+        if (this_currency.lower() == 'usd'):
+            this_price_converted = this_price * usd_to_roubles
+        elif (this_currency.lower() == 'euro'):
+            this_price_converted = this_price * euro_to_roubles
+        else:
+            this_price_converted = this_price
+
+        # Sets best trader buy
+        if (this_price_converted < min_buy):
+            best_trader_buy_price = this_price
+            best_trader_buy = vendor['vendor']['normalizedName']
+            best_trader_buy_currency = this_currency
+            best_trader_level = vendor['vendor']['minTraderLevel']
+            min_buy = this_price_converted
+
+            if (vendor['vendor']['taskUnlock']):
+                best_trader_task_req = vendor['vendor']['taskUnlock']['normalizedName']
+            else:
+                best_trader_task_req = 'N/A'
 
-        # Updating item in database
+            if (best_trader_buy_currency.lower() in ['usd', 'euro']):
+                best_trader_buy_roubles = this_price_converted
+            else:
+                best_trader_buy_roubles = 0
+
+    # Setting inventory values
+    if (guid not in database['items'].keys()):
+        database['items'][guid] = {
+            'need_fir': 0,
+            'need_nir': 0,
+            'have_fir': 0,
+            'have_nir': 0,
+            'consumed_fir': 0,
+            'consumed_nir': 0
+        }
+
+    # Updating item in database
+    if ('normalizedName' in item.keys()):
         database['items'][guid]['normalizedName'] = item['normalizedName']
         database['items'][guid]['shortName'] = item['shortName']
-        database['items'][guid]['flea_price'] = flea_price
-        database['items'][guid]['flea_currency'] = flea_currency
-        database['items'][guid]['best_trader_sell'] = best_trader_sell
-        database['items'][guid]['best_trader_sell_price'] = best_trader_sell_price
-        database['items'][guid]['best_trader_sell_currency'] = best_trader_sell_currency
-        database['items'][guid]['best_trader_buy'] = best_trader_buy
-        database['items'][guid]['best_trader_buy_price'] = best_trader_buy_price
-        database['items'][guid]['best_trader_buy_currency'] = best_trader_buy_currency
-        database['items'][guid]['best_trader_level'] = best_trader_level
-        database['items'][guid]['best_trader_task_req'] = best_trader_task_req
-        database['items'][guid]['flea_level'] = flea_level
-
-        if (best_trader_sell_roubles):
-            database['items'][guid]['best_trader_sell_roubles'] = best_trader_sell_roubles
-
-        if (best_trader_buy_roubles):
-            database['items'][guid]['best_trader_buy_roubles'] = best_trader_buy_roubles
+        add_search_forms(database['items'][guid], 'items')
+
+    database['items'][guid]['flea_price'] = flea_price
+    database['items'][guid]['flea_currency'] = flea_currency
+    database['items'][guid]['best_trader_sell'] = best_trader_sell
+    database['items'][guid]['best_trader_sell_price'] = best_trader_sell_price
+    database['items'][guid]['best_trader_sell_currency'] = best_trader_sell_currency
+    database['items'][guid]['best_trader_buy'] = best_trader_buy
+    database['items'][guid]['best_trader_buy_price'] = best_trader_buy_price
+    database['items'][guid]['best_trader_buy_currency'] = best_trader_buy_currency
+    database['items'][guid]['best_trader_level'] = best_trader_level
+    database['items'][guid]['best_trader_task_req'] = best_trader_task_req
+    database['items'][guid]['flea_level'] = flea_level
+
+    if (best_trader_sell_roubles):
+        database['items'][guid]['best_trader_sell_roubles'] = best_trader_sell_roubles
+
+    if (best_trader_buy_roubles):
+        database['items'][guid]['best_trader_buy_roubles'] = best_trader_buy_roubles
 
-    database['refresh'] = datetime.now().isoformat()
-    print(f'Successfully loaded item data into the database!')
     return database
 
-def import_maps(database, headers):
-    data = {
-        'query': """
-            {
-                maps {
-                    id
-                    normalizedName
-                }
-            }
-        """
-    }
-    
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
-
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
-
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_error(f'Errors detected {json.dumps(response.json())}')
-            return False
-
-        print('Retrieved latest map data from the api.tarkov.dev server')
-        maps = response.json()['data']['maps']
-
+def process_maps(database, maps):
     for map in maps:
         guid = map['id']
         del map['id']
@@ -2870,47 +4660,12 @@ def import_maps(database, headers):
         elif (map['normalizedName'] == 'the-lab'):
             map['normalizedName'] = 'labs'
 
-        database['maps'][guid] = map
+        database['maps'][guid] = add_search_forms(map, 'maps')
 
     print(f'Successfully loaded map data into the database!')
     return database
 
-def import_traders(database, headers):
-    data = {
-        'query': """
-            {
-                traders {
-                    id
-                    normalizedName
-                }
-            }
-        """
-    }
-    
-    stop = threading.Event()
-    progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
-    progress_bar_thread.start()
-
-    try:
-        response = requests.post(url = 'https://api.tarkov.dev/graphql', headers = headers, json = data)
-    except:
-        print_error('Encountered error retrieving data')
-        return False
-    finally:
-        stop.set()
-        progress_bar_thread.join()
-
-    if (response.status_code < 200 or response.status_code > 299):
-        print_error(f'Network error [{response.status_code}] {response.content}')
-        return False
-    else:
-        if ('errors' in response.json().keys()):
-            print_error(f'Errors detected {json.dumps(response.json())}')
-            return False
-
-        print('Retrieved latest trader data from the api.tarkov.dev server')
-        traders = response.json()['data']['traders']
-
+def process_traders(database, traders):
     for trader in traders:
         guid = trader['id']
         del trader['id']
@@ -2918,7 +4673,7 @@ def import_traders(database, headers):
         if (trader['normalizedName'] == 'btr-driver'):
             trader['normalizedName'] = 'btr'
 
-        database['traders'][guid] = trader
+        database['traders'][guid] = add_search_forms(trader, 'traders')
 
     print(f'Successfully loaded trader data into the database!')
     return database
@@ -3060,6 +4815,7 @@ def display_tasks(database, tasks):
     table_rows = []
     duplicates = [] # There are some duplicate tasks for USEC and BEAR (i.e., Textile Part 1 and 2)
     maps = {}
+    mapped = {}
 
     # Setting up the map display
     for guid, task in tasks.items():
@@ -3075,10 +4831,10 @@ def display_tasks(database, tasks):
         else:
             maps[map] = 1
         
-        task['map'] = map
+        mapped[guid] = task | {'map': map}
 
     maps = dict(sorted(maps.items(), key = lambda item: item[1], reverse = True))
-    tasks = alphabetize_tasks(tasks)
+    tasks = alphabetize_tasks(mapped)
     
     for guid, task in tasks.items():
         if (task['name'] in duplicates):
@@ -3130,9 +4886,8 @@ def display_tasks(database, tasks):
         
         if (task['neededKeys'] is not None and len(task['neededKeys']) > 0):
             for _key_ in task['neededKeys']:
-                for key in _key_['keys']:
+                for key_guid in _key_:
                     key_string = '-->'
-                    key_guid = key['id']
                     key_string = key_string + f' Acquire {database['items'][key_guid]['shortName']} key'
                         
                     if (database['items'][key_guid]['have_nir'] - database['items'][key_guid]['consumed_nir'] > 0):
@@ -3164,20 +4919,15 @@ def display_hideout(database, stations):
         table_rows.append([station['normalizedName'], station['status'], display_bool(station['tracked']), guid])
 
         for item in station['itemRequirements']:
-            item_guid = item['item']['id']
-            count = item['count']
+            item_guid = item.item
+            count = item.count
             short_name = database['items'][item_guid]['shortName']
-            foundInRaid = False
 
             if (station['status'] == 'incomplete'):
                 have_available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
                 have_available_fir = database['items'][item_guid]['have_fir'] - database['items'][item_guid]['consumed_fir']
 
-                for attribute in item['attributes']:
-                    if (attribute['type'] == 'foundInRaid' and attribute['value'] == 'true'):
-                        foundInRaid = True
-
-                if (foundInRaid):
+                if (item.fir):
                     table_rows.append([f'--> ({have_available_fir}/{count}) FIR {short_name} needed'])
                 else:
                     display = f'--> {have_available_nir}/{count} {short_name} needed'
@@ -3205,9 +4955,9 @@ def display_barters(database, barters):
         table_rows.append([guid, database['traders'][barter['trader']['id']]['normalizedName'], barter['level'], barter['status'], display_bool(barter['tracked']), barter['restarts']])
 
         for item in barter['requiredItems']:
-            item_guid = item['item']['id']
+            item_guid = item.item
             item_name = database['items'][item_guid]['shortName']
-            count = item['count']
+            count = item.count
 
             if (barter['status'] == 'incomplete'):
                 have_available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
@@ -3222,9 +4972,9 @@ def display_barters(database, barters):
                 table_rows.append([f'--> {count}/{count} {item_name} consumed'])
 
         for item in barter['rewardItems']:
-            item_guid = item['item']['id']
+            item_guid = item.item
             item_name = database['items'][item_guid]['shortName']
-            count = item['count']
+            count = item.count
             table_rows.append([f'--> Receive {count} {item_name}'])
 
         if (barter['taskUnlock'] is not None):
@@ -3255,9 +5005,9 @@ def display_crafts(database, crafts):
             table_rows.append([guid, 'unknown', craft['status'], display_bool(craft['tracked']), craft['restarts']])
 
         for item in craft['requiredItems']:
-            item_guid = item['item']['id']
+            item_guid = item.item
             item_name = database['items'][item_guid]['shortName']
-            count = item['count']
+            count = item.count
 
             if (craft['status'] == 'incomplete'):
                 have_available_nir = database['items'][item_guid]['have_nir'] - database['items'][item_guid]['consumed_nir']
@@ -3272,9 +5022,9 @@ def display_crafts(database, crafts):
                 table_rows.append([f'--> {count}/{count} {item_name} consumed'])
 
         for item in craft['rewardItems']:
-            item_guid = item['item']['id']
+            item_guid = item.item
             item_name = database['items'][item_guid]['shortName']
-            count = item['count']
+            count = item.count
             table_rows.append([f'--> Receive {count} {item_name}'])
 
         if (craft['taskUnlock'] is not None):
@@ -3305,7 +5055,7 @@ def display_untracked(database, untracked):
     print('\n')
     return True
 
-def display_items(items):
+def display_items(items, age = None):
     print('\nAvailable / Total / Need\n')
     items = alphabetize_items(items)
     table_rows = []
@@ -3345,6 +5095,7 @@ def display_items(items):
     if (not table_wrapper(table_rows, headers = ITEM_TABLE, max_chunks = 1)):
         print('Something went wrong.')
 
+    print(f'Prices last refreshed {format_age(age)}')
     print('\n')
     return True
 
@@ -3406,7 +5157,7 @@ def display_search(database, tasks, hideout, barters, crafts, items, traders, ma
         display_crafts(database, crafts)
 
     if (items):
-        display_items(items)
+        display_items(items, price_age(database))
 
     if (traders):
         display_traders(traders)
@@ -3425,8 +5176,8 @@ def display_search(database, tasks, hideout, barters, crafts, items, traders, ma
 
 
 # Inventory
-def inventory(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3434,8 +5185,8 @@ def inventory(tracker_file, directory):
     display_inventory(get_inventory(database))
     return True
 
-def inventory_tasks(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_tasks(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3449,8 +5200,8 @@ def inventory_tasks(tracker_file, directory):
 
     return True
 
-def inventory_hideout(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_hideout(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3464,8 +5215,8 @@ def inventory_hideout(tracker_file, directory):
 
     return True
 
-def inventory_barters(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_barters(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3479,8 +5230,8 @@ def inventory_barters(tracker_file, directory):
 
     return True
 
-def inventory_crafts(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_crafts(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3494,8 +5245,8 @@ def inventory_crafts(tracker_file, directory):
 
     return True
 
-def inventory_have(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_have(session):
+    database = load_database(session)
 
     if (not database):
         return False
@@ -3509,13 +5260,16 @@ def inventory_have(tracker_file, directory):
 
     return True
 
-def inventory_need(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def inventory_need(session):
+    database = load_database(session)
 
     if (not database):
         return False
     
-    need_items = get_inventory_need(database)
+    if (queryable(session)):
+        need_items = select_inventory_need(session, database)
+    else:
+        need_items = get_inventory_need(database)
     
     if (len(need_items) == 0):
         print('No items needed. CONGRATULATIONS!')
@@ -3525,14 +5279,16 @@ def inventory_need(tracker_file, directory):
     return True
 
 # List
-def list_tasks(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def list_tasks(session, argument):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
         return False
     
-    if (argument == 'all'):
+    if (queryable(session)):
+        tasks = select_tasks(session, database, argument)
+    elif (argument == 'all'):
         tasks = get_tasks(database)
     else:
         tasks = get_tasks_filtered(database, argument)
@@ -3544,8 +5300,8 @@ def list_tasks(tracker_file, directory, argument):
     display_tasks(database, tasks)
     return True
 
-def list_stations(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def list_stations(session):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3560,8 +5316,9 @@ def list_stations(tracker_file, directory):
     
     return True
 
-def list_barters(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def list_barters(session, argument):
+    sections = ['barters', 'traders', 'items']
+    database = load_database(session, sections)
 
     if (not database):
         print_error('Failed to open database')
@@ -3575,12 +5332,20 @@ def list_barters(tracker_file, directory, argument):
     if (len(barters) == 0):
         print('No tracked barters found')
         return False
+
+    # Task names are only read when a listed barter is unlocked by a task
+    if (any([barter['taskUnlock'] is not None for barter in barters.values()])):
+        database = load_database(session, sections + ['tasks'])
+
+        if (not database):
+            print_error('Failed to open database')
+            return False
     
     display_barters(database, barters)
     return True
 
-def list_crafts(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def list_crafts(session):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3595,8 +5360,8 @@ def list_crafts(tracker_file, directory):
     
     return True
 
-def list_untracked(tracker_file, directory, ignore_kappa):
-    database = open_database(tracker_file, directory)
+def list_untracked(session, ignore_kappa):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3613,8 +5378,8 @@ def list_untracked(tracker_file, directory, ignore_kappa):
 
     return True
 
-def list_maps(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def list_maps(session):
+    database = load_database(session, ['maps'])
 
     if (not database):
         print_error('Failed to open database')
@@ -3623,8 +5388,8 @@ def list_maps(tracker_file, directory):
     maps = ', '.join(map['normalizedName'] for guid, map in database['maps'].items()).strip(', ')
     print(f'Accepted map names are: {maps}')
 
-def list_traders(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def list_traders(session):
+    database = load_database(session, ['traders'])
 
     if (not database):
         print_error('Failed to open database')
@@ -3634,38 +5399,31 @@ def list_traders(tracker_file, directory):
     print(f'Accepted trader names are: {traders}')
 
 # Search
-def search(tracker_file, directory, argument, ignore_barters, ignore_crafts):
-    database = open_database(tracker_file, directory)
+def search(session, argument, ignore_barters, ignore_crafts):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
         return False
 
-    if (datetime.fromisoformat(database['refresh']) < (datetime.now() - timedelta(hours = 24))):
-        print('Item price data is over 24 hours old. Refreshing...')
-        database = import_items(database, headers = {
-            'Content-Type': 'application/json'
-        })
-        write_database(tracker_file, directory, database)
-
     stop = threading.Event()
     progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
     progress_bar_thread.start()
 
     try:
-        tasks = search_tasks(argument, database)
-        hideout = search_hideout(argument, database)
-        barters = search_barters(argument, database)
-        crafts = search_crafts(argument, database)
-        items = search_items(argument, database)
-        traders = search_traders(argument, database)
-        maps = search_maps(argument, database)
+        tasks = search_part(database, 'tasks', argument, search_tasks)
+        hideout = search_part(database, 'hideout', argument, search_hideout)
+        barters = search_part(database, 'barters', argument, search_barters)
+        crafts = search_part(database, 'crafts', argument, search_crafts)
+        items = search_part(database, 'items', argument, search_items)
+        traders = search_part(database, 'traders', argument, search_traders)
+        maps = search_part(database, 'maps', argument, search_maps)
     finally:
         stop.set()
         progress_bar_thread.join()
 
     if (not ignore_barters):
-        _barters_ = search_barters_by_item(argument, database)
+        _barters_ = search_part(database, 'barters_by_item', argument, search_barters_by_item)
 
         if (barters and _barters_):
             barters = barters | _barters_
@@ -3673,7 +5431,7 @@ def search(tracker_file, directory, argument, ignore_barters, ignore_crafts):
             barters = _barters_
 
     if (not ignore_crafts):
-        _crafts_ = search_crafts_by_item(argument, database)
+        _crafts_ = search_part(database, 'crafts_by_item', argument, search_crafts_by_item)
 
         if (crafts and _crafts_):
             crafts = crafts | _crafts_
@@ -3683,41 +5441,41 @@ def search(tracker_file, directory, argument, ignore_barters, ignore_crafts):
     display_search(database, tasks, hideout, barters, crafts, items, traders, maps)
     return True
 
-def required_search(tracker_file, directory, argument, ignore_barters, ignore_crafts):
-    database = open_database(tracker_file, directory)
+# Consumers of the matching items from an indexed SELECT when the tracker is kept in SQLite, otherwise from the consumer index
+def required_part(session, database, kind, text, function, *arguments):
+    if (queryable(session)):
+        return select_by_item(session, database, text, SEARCH_PARTS[kind][0], *arguments)
+
+    return search_part(database, kind, text, function, *arguments)
+
+def required_search(session, argument, ignore_barters, ignore_crafts):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
         return False
     
-    if (datetime.fromisoformat(database['refresh']) < (datetime.now() - timedelta(hours = 24))):
-        print('Item price data is over 24 hours old. Refreshing...')
-        database = import_items(database, headers = {
-            'Content-Type': 'application/json'
-        })
-        write_database(tracker_file, directory, database)
-        print('Complete')
-    
     stop = threading.Event()
     progress_bar_thread = threading.Thread(target = progress_bar, args = (stop,))
     progress_bar_thread.start()
 
     try:
-        tasks = search_tasks_by_item(argument, database)
-        hideout = search_hideout_by_item(argument, database)
+        tasks = required_part(session, database, 'tasks_by_item', argument, search_tasks_by_item)
+        hideout = required_part(session, database, 'hideout_by_item', argument, search_hideout_by_item)
     finally:
         stop.set()
         progress_bar_thread.join()
 
+    # Arguments are (required_only, tracked_only)
     if (not ignore_barters):
-        barters = search_barters_by_item(argument, database, required_only = True)
+        barters = required_part(session, database, 'barters_by_item', argument, search_barters_by_item, True, False)
     else:
-        barters = search_barters_by_item(argument, database, tracked_only = True)
+        barters = required_part(session, database, 'barters_by_item', argument, search_barters_by_item, False, True)
 
     if (not ignore_crafts):
-        crafts = search_crafts_by_item(argument, database, required_only = True)
+        crafts = required_part(session, database, 'crafts_by_item', argument, search_crafts_by_item, True, False)
     else:
-        crafts = search_crafts_by_item(argument, database, tracked_only = True)
+        crafts = required_part(session, database, 'crafts_by_item', argument, search_crafts_by_item, False, True)
 
     if (not tasks and not hideout and not barters and not crafts):
         print('\nItem not required\n')
@@ -3726,8 +5484,8 @@ def required_search(tracker_file, directory, argument, ignore_barters, ignore_cr
     return True
 
 # Track
-def track(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def track(session, argument):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3748,11 +5506,11 @@ def track(tracker_file, directory, argument):
     else:
         database = track_craft(database, guid)
     
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = entity_references(database, section_of(database, guid), guid))
     return True
 
-def untrack(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def untrack(session, argument):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3773,12 +5531,12 @@ def untrack(tracker_file, directory, argument):
     else:
         database = untrack_craft(database, guid)
     
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = entity_references(database, section_of(database, guid), guid))
     return True
 
 # Complete
-def complete(tracker_file, directory, argument, force, recurse):
-    database = open_database(tracker_file, directory)
+def complete(session, argument, force, recurse):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3792,30 +5550,42 @@ def complete(tracker_file, directory, argument, force, recurse):
     
     if (guid in database['tasks'].keys()):
         if (not recurse):
-            database = complete_task(database, guid, force)
+            snapshot = checkpoint(database, entity_references(database, 'tasks', guid))
+            _database_ = complete_task(database, guid, force)
         else:
             tasks = complete_recursive_task(database, guid)
+            references = []
+
+            for task_guid in tasks:
+                references.extend(entity_references(database, 'tasks', task_guid))
+
+            snapshot = checkpoint(database, references)
+            _database_ = database
 
             for guid in tasks:
-                if (database):
-                    database = complete_task(database, guid, force)
+                if (_database_):
+                    _database_ = complete_task(_database_, guid, force)
 
     elif (guid in database['hideout'].keys()):
-        database = complete_station(database, guid, force)
+        snapshot = checkpoint(database, entity_references(database, 'hideout', guid))
+        _database_ = complete_station(database, guid, force)
     elif (guid in database['barters'].keys()):
-        database = complete_barter(database, guid, force)
+        snapshot = checkpoint(database, entity_references(database, 'barters', guid))
+        _database_ = complete_barter(database, guid, force)
     else:
-        database = complete_craft(database, guid, force)
+        snapshot = checkpoint(database, entity_references(database, 'crafts', guid))
+        _database_ = complete_craft(database, guid, force)
 
-    if (database):
-        write_database(tracker_file, directory, database)
+    if (_database_):
+        save_database(session, _database_, changes = list(snapshot.keys()))
         return True
-    
+
+    rollback(database, snapshot)
     return False
 
 # Restart
-def restart(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def restart(session, argument):
+    database = load_database(session)
 
     if (not database):
         print_error('Failed to open database')
@@ -3833,14 +5603,14 @@ def restart(tracker_file, directory, argument):
         database = restart_craft(database, guid)
 
     if (database):
-        write_database(tracker_file, directory, database)
+        save_database(session, database, changes = entity_references(database, section_of(database, guid), guid))
         return True
     
     return False
 
 # Add
-def write_item_fir(tracker_file, directory, count, argument):
-    database = open_database(tracker_file, directory)
+def write_item_fir(session, count, argument):
+    database = load_database(session)
     guid = find_item(argument, database)
 
     if (not guid):
@@ -3852,11 +5622,11 @@ def write_item_fir(tracker_file, directory, count, argument):
     if (not database):
         return False
 
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = [('items', guid)])
     return True
 
-def write_item_nir(tracker_file, directory, count, argument):
-    database = open_database(tracker_file, directory)
+def write_item_nir(session, count, argument):
+    database = load_database(session)
     guid = find_item(argument, database)
 
     if (not guid):
@@ -3868,12 +5638,12 @@ def write_item_nir(tracker_file, directory, count, argument):
     if (not database):
         return False
 
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = [('items', guid)])
     return True
 
 # Delete
-def unwrite_item_fir(tracker_file, directory, count, argument):
-    database = open_database(tracker_file, directory)
+def unwrite_item_fir(session, count, argument):
+    database = load_database(session)
     guid = find_item(argument, database)
 
     if (not guid):
@@ -3885,11 +5655,11 @@ def unwrite_item_fir(tracker_file, directory, count, argument):
     if (not database):
         return False
 
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = [('items', guid)])
     return True
 
-def unwrite_item_nir(tracker_file, directory, count, argument):
-    database = open_database(tracker_file, directory)
+def unwrite_item_nir(session, count, argument):
+    database = load_database(session)
     guid = find_item(argument, database)
 
     if (not guid):
@@ -3901,12 +5671,12 @@ def unwrite_item_nir(tracker_file, directory, count, argument):
     if (not database):
         return False
 
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = [('items', guid)])
     return True
 
 # Level
-def check_level(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def check_level(session):
+    database = load_database(session, [])
 
     if (not database):
         print_error('Failed to open database')
@@ -3915,33 +5685,33 @@ def check_level(tracker_file, directory):
     print(f'\nYou are level {database["player_level"]}\n')
     return True
 
-def set_level(tracker_file, directory, level):
-    database = open_database(tracker_file, directory)
+def set_level(session, level):
+    database = load_database(session, [])
 
     if (not database):
         print_error('Failed to open database')
         return False
     
     database['player_level'] = level
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = ['player_level'])
     print(f'\nYour level is now {level}\n')
     return True
 
-def level_up(tracker_file, directory):
-    database = open_database(tracker_file, directory)
+def level_up(session):
+    database = load_database(session, [])
 
     if (not database):
         print_error('Failed to open database')
         return False
     
     database['player_level'] = database['player_level'] + 1
-    write_database(tracker_file, directory, database)
+    save_database(session, database, changes = ['player_level'])
     print(f'\nLevel up! Your level is now {database["player_level"]}\n')
     return True
 
 # Notes
-def note(tracker_file, directory, argument):
-    database = open_database(tracker_file, directory)
+def note(session, argument):
+    database = load_database(session, [])
 
     if (not database):
         print_error('Failed to open database')
@@ -3955,7 +5725,7 @@ def note(tracker_file, directory, argument):
         if (argument[0] == 'delete'):
             if (len(argument) > 1 and argument[1] in database['notes'].keys()):
                 del database['notes'][argument[1]]
-                write_database(tracker_file, directory, database)
+                save_database(session, database, changes = ['notes'])
                 print(f'Deleted note {argument[1]}')
                 return True
             else:
@@ -3967,13 +5737,13 @@ def note(tracker_file, directory, argument):
                 break
             else:
                 database['notes'][name].append(' '.join(argument[1:]))
-                write_database(tracker_file, directory, database)
+                save_database(session, database, changes = ['notes'])
                 print(f'Appended {" ".join(argument[1:])} to note {argument[0]}')
                 break
     else:
         if (len(argument) > 1):
             database['notes'][argument[0]] = [' '.join(argument[1:])]
-            write_database(tracker_file, directory, database)
+            save_database(session, database, changes = ['notes'])
             print(f'Created new note {argument[0]} with element {" ".join(argument[1:])}')
         else:
             print_error(f'No note found matching {argument[0]}')
@@ -3987,7 +5757,7 @@ def clear():
     return True
 
 # Import
-def import_data(tracker_file, directory):
+def import_data(session, batch = False):
     database = {
         'tasks': {},
         'hideout': {},
@@ -4004,67 +5774,47 @@ def import_data(tracker_file, directory):
     headers = {
         'Content-Type': 'application/json'
     }
-    database = import_maps(database, headers)
-
-    if (not database):
-        print_error('Encountered error while importing maps. Import aborted')
-        return False
 
-    database = import_traders(database, headers)
-
-    if (not database):
-        print_error('Encountered error while importing traders. Import aborted')
-        return False
-
-    database = import_items(database, headers)
-
-    if (not database):
-        print_error('Encountered error while importing items. Import aborted')
-        return False
-
-    database = import_tasks(database, headers)
-
-    if (not database):
-        print_error('Encountered error while importing tasks. Import aborted')
-        return False
-
-    database = import_hideout(database, headers)
+    if (batch):
+        data = fetch_data(list(QUERIES.keys()), headers, batch = True)
+    else:
+        data = fetch_data([name for name in QUERIES.keys() if name != 'items'], headers, stream = database)
 
-    if (not database):
-        print_error('Encountered error while importing hideout stations. Import aborted')
+    if (not data):
+        print_error('Encountered error while retrieving game data. Import aborted')
         return False
 
-    database = import_barters(database, headers)
-
-    if (not database):
-        print_error('Encountered error while importing barters. Import aborted')
-        return False
+    database = process_maps(database, data['maps'])
+    database = process_traders(database, data['traders'])
 
-    database = import_crafts(database, headers)
+    if (batch):
+        database = process_items(database, data['items'])
+    else:
+        print(f'Successfully loaded item data into the database!')
 
-    if (not database):
-        print_error('Encountered error while importing crafts. Import aborted')
-        return False
-    
+    database = process_tasks(database, data['tasks'])
+    database = process_hideout(database, data['hideoutStations'])
+    database = process_barters(database, data['barters'])
+    database = process_crafts(database, data['crafts'])
     database = calculate_inventory(database)
-    write_database(tracker_file, directory, database)
-    print(f'Finished importing game data and saved to {tracker_file}')
+    save_database(session, database)
+    print(f'Finished importing game data and saved to {session['tracker_file']}')
     return True
 
-def delta(tracker_file, directory):
-    previous = open_database(tracker_file, directory)
-    delta = import_data(tracker_file, directory)
+def delta(session):
+    previous = load_database(session)
+    delta = import_data(session)
 
     if (not delta):
         print_error('Encountered an error while importing the database. Aborted')
-        write_database(tracker_file, directory, previous)
+        save_database(session, previous)
         return False
 
-    database = open_database(tracker_file, directory)
+    database = load_database(session)
 
     if (not database):
         print_error('Something went wrong opening the database. Aborted')
-        write_database(tracker_file, directory, previous)
+        save_database(session, previous)
         return False
 
     # Tasks    
@@ -4077,7 +5827,7 @@ def delta(tracker_file, directory):
                 continue
 
             print('Aborted')
-            write_database(tracker_file, directory, previous)
+            save_database(session, previous)
             return False
 
         delta_task = database['tasks'][guid]
@@ -4092,7 +5842,7 @@ def delta(tracker_file, directory):
 
                 if (_confirmation_ != 'y'):
                     print('Aborted')
-                    write_database(tracker_file, directory, previous)
+                    save_database(session, previous)
                     return False
 
                 database = untrack_task(database, guid)
@@ -4102,7 +5852,7 @@ def delta(tracker_file, directory):
 
                 if (_confirmation_ != 'y'):
                     print('Aborted')
-                    write_database(tracker_file, directory, previous)
+                    save_database(session, previous)
                     return False
                 
             elif (task['kappaRequired'] and not task['tracked']):
@@ -4113,7 +5863,7 @@ def delta(tracker_file, directory):
                 database = track_task(database, guid)
             else:
                 print_error('Unhandled error with (un)tracked tasks. Aborted')
-                write_database(tracker_file, directory, previous)
+                save_database(session, previous)
                 return False
                         
     print('Completed tasks delta import')
@@ -4128,7 +5878,7 @@ def delta(tracker_file, directory):
                 continue
 
             print('Aborted')
-            write_database(tracker_file, directory, previous)
+            save_database(session, previous)
             return False
 
         delta_station = database['hideout'][guid]
@@ -4153,7 +5903,7 @@ def delta(tracker_file, directory):
             for delta_guid, delta_barter in database['barters'].items():
                 for previous_requirement in previous_barter['requiredItems']:
                     for delta_requirement in delta_barter['requiredItems']:
-                        if (previous_requirement['item']['id'] == delta_requirement['item']['id'] and previous_requirement['count'] == delta_requirement['count']):
+                        if (previous_requirement.item == delta_requirement.item and previous_requirement.count == delta_requirement.count):
                             # match for this requirement
                             break
                     else:
@@ -4165,7 +5915,7 @@ def delta(tracker_file, directory):
                     # matched all requirements
                     for previous_reward in previous_barter['rewardItems']:
                         for delta_reward in delta_barter['rewardItems']:
-                            if (previous_reward['item']['id'] == delta_reward['item']['id'] and previous_reward['count'] == delta_reward['count']):
+                            if (previous_reward.item == delta_reward.item and previous_reward.count == delta_reward.count):
                                 # match for this reward
                                 break
                         else:
@@ -4206,10 +5956,10 @@ def delta(tracker_file, directory):
         if ('restarts' in previous_barter.keys() and previous_barter['restarts'] > 0):
             for _restart_ in range(previous_barter['restarts']):
                 for requirement in previous_barter['requiredItems']:
-                    item_guid = requirement['item']['id']
+                    item_guid = requirement.item
                     item_name = database['items'][item_guid]['shortName']
-                    count = requirement['count']
-                    database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+                    count = requirement.count
+                    database = add_need(database, 'barters', item_guid, count, False)
                     print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement')
                     print(f'{count} more {item_name} (NIR) now needed')
             
@@ -4226,7 +5976,7 @@ def delta(tracker_file, directory):
             for delta_guid, delta_craft in database['crafts'].items():
                 for previous_requirement in previous_craft['requiredItems']:
                     for delta_requirement in delta_craft['requiredItems']:
-                        if (previous_requirement['item']['id'] == delta_requirement['item']['id'] and previous_requirement['count'] == delta_requirement['count']):
+                        if (previous_requirement.item == delta_requirement.item and previous_requirement.count == delta_requirement.count):
                             # match for this requirement
                             break
                     else:
@@ -4238,7 +5988,7 @@ def delta(tracker_file, directory):
                     # matched all requirements
                     for previous_reward in previous_craft['rewardItems']:
                         for delta_reward in delta_craft['rewardItems']:
-                            if (previous_reward['item']['id'] == delta_reward['item']['id'] and previous_reward['count'] == delta_reward['count']):
+                            if (previous_reward.item == delta_reward.item and previous_reward.count == delta_reward.count):
                                 # match for this reward
                                 break
                         else:
@@ -4279,10 +6029,10 @@ def delta(tracker_file, directory):
         if ('restarts' in previous_craft.keys() and previous_craft['restarts'] > 0):
             for _restart_ in range(previous_craft['restarts']):
                 for requirement in previous_craft['requiredItems']:
-                    item_guid = requirement['item']['id']
+                    item_guid = requirement.item
                     item_name = database['items'][item_guid]['shortName']
-                    count = requirement['count']
-                    database['items'][item_guid]['need_nir'] = database['items'][item_guid]['need_nir'] + count
+                    count = requirement.count
+                    database = add_need(database, 'crafts', item_guid, count, False)
                     print_debug(f'Adding >> {count} << of >> {item_guid} << for requirement')
                     print(f'{count} more {item_name} (NIR) now needed')
             
@@ -4301,7 +6051,7 @@ def delta(tracker_file, directory):
                 continue
 
             print('Aborted')
-            write_database(tracker_file, directory, previous)
+            save_database(session, previous)
             return False
         
         if (database['items'][guid]['have_nir'] != item['have_nir']):
@@ -4322,12 +6072,14 @@ def delta(tracker_file, directory):
     database['player_level'] = previous['player_level']
     database['refresh'] = previous['refresh']
     print('Restored player level, price refresh timeout, and notes')
-    write_database(tracker_file, directory, database)
+    save_database(session, database)
     print('Completed database delta import')
     return True
 
 # Backup
-def backup(tracker_file, directory):
+def backup(session):
+    tracker_file = session['tracker_file']
+    directory = session['directory']
     saves = get_saves(tracker_file, directory)
     
     if (('curr.null' in saves and 'prev.null' in saves and len(saves) > 4) or
@@ -4362,14 +6114,21 @@ def backup(tracker_file, directory):
         print(f'Overwriting save file {overwrite}')
         remove(directory + f'\\{overwrite}')
 
-    database = open_database(tracker_file, directory)
+    database = load_database(session)
+
+    if (not database):
+        print_error('Failed to open database')
+        return False
+
     filename = f'{tracker_file}.{datetime.now().strftime('%Y-%m-%d.%H-%M-%S')}.bak'
     write_database(filename, directory, database)
     print(f'Created new save file {filename}')
     return True
 
 # Restore
-def restore(tracker_file, directory):
+def restore(session):
+    tracker_file = session['tracker_file']
+    directory = session['directory']
     saves = get_saves(tracker_file, directory)
     print('Please choose a save file to restore from')
     _display_ = '\n'
@@ -4398,8 +6157,13 @@ def restore(tracker_file, directory):
     
     restore = saves[int(restore) - 1]
     print(f'Restoring from save file {restore}')
-    restore_database = open_database(restore, directory)
-    write_database(tracker_file, directory, restore_database)
+    restore_database, _baseline_, _overlay_ = read_tracker(restore, directory)
+
+    if (not restore_database):
+        print_error(f'Failed to open save file {restore}')
+        return False
+
+    save_database(session, restore_database)
     return True
 
 
@@ -4425,6 +6189,9 @@ def main(args):
     else:
         tracker_file = 'database.json'
 
+    if ((len(args) > 1 and args[1] == 'benchmark')):
+        return benchmark_snapshot(tracker_file, database_directory)
+
     if (app_directory not in environ.get('PATH')):
         user_env = subprocess.check_output(['reg', 'query', 'HKEY_CURRENT_USER\\Environment']).decode('UTF-8')
         user_env = re.sub(' +', ' ', user_env[int(user_env.find('Path')):]).replace('\r\n', '').split(' ')[2]
@@ -4440,11 +6207,18 @@ def main(args):
 
     print('Welcome to the TARkov Tracker (TART)! Type help for usage. Enter "import" to get started')
 
+    session = open_session(tracker_file, database_directory)
+    start_refresher(session)
+
     while(True):
         command = input('> ')
-        running = parser(tracker_file, database_directory, command)
+
+        with session['lock']:
+            running = parser(session, command)
+            flush_database(session)
         
         if (not running):
+            session['stop'].set()
             print('Goodbye.')
             return True
 